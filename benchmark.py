@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .fake_salesforce import FakeSalesforce, serve
+
+# Drives `python -m copado_mcp.server` over stdio against the local fake Salesforce (or,
+# with --mock, its own generated mock store) and reports per-tool latency percentiles and
+# throughput at several dataset sizes:
+#
+#   python -m copado_mcp.benchmark --sizes 1000,100000,1000000 --latency 0.05
+#
+# The 1M-record dataset needs a few GB of memory for the fake org.
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StdioSession:
+    """Minimal MCP client: responses are matched to requests by id, so requests may
+    be pipelined and answered out of order, as the server's dispatcher allows."""
+
+    def __init__(self, env: Dict[str, str]):
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "copado_mcp.server"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            cwd=PACKAGE_PARENT
+        )
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._waiters: Dict[int, Tuple[threading.Event, List[Dict[str, Any]]]] = {}
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if "id" not in message:
+                continue
+            with self._lock:
+                waiter = self._waiters.pop(message["id"], None)
+            if waiter:
+                waiter[1].append(message)
+                waiter[0].set()
+
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None) -> Callable[[], Dict[str, Any]]:
+        # Returns a function that blocks until the matching response arrives
+        with self._lock:
+            self._next_id += 1
+            req_id = self._next_id
+            event, box = threading.Event(), []
+            self._waiters[req_id] = (event, box)
+        line = json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}}) + "\n"
+        self.process.stdin.write(line.encode())
+        self.process.stdin.flush()
+
+        def wait() -> Dict[str, Any]:
+            if not event.wait(300):
+                raise TimeoutError(f"No response to {method} #{req_id}")
+            return box[0]
+        return wait
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.send(method, params)()
+
+    def close(self):
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _tool(session: StdioSession, name: str, arguments: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+    return session.send("tools/call", {"name": name, "arguments": arguments})
+
+
+def scenarios(story_ids: List[str], promotion_ids: List[str]) -> List[Tuple[str, str, Callable[[int], Dict[str, Any]]]]:
+    # (label, tool, arguments for the i-th call)
+    return [
+        ("list_user_stories", "list_user_stories", lambda i: {"format": "compact"}),
+        ("list_user_stories(status)", "list_user_stories", lambda i: {"status": "In Progress", "format": "compact"}),
+        ("list_user_stories(columnar,fields)", "list_user_stories", lambda i: {"fields": ["id", "status"], "format": "columnar"}),
+        ("list_promotions", "list_promotions", lambda i: {"format": "compact"}),
+        ("create_promotion", "create_promotion", lambda i: {"source_env": "Dev", "target_env": "UAT", "user_story_ids": story_ids}),
+        ("deploy_promotion", "deploy_promotion", lambda i: {"promotion_id": promotion_ids[i % len(promotion_ids)]}),
+    ]
+
+
+def run_size(size: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    promotions = max(10, size // 100)
+    config = {
+        "cache": {"enabled": args.cache},
+        "environments": {"preload": True},
+        "deploy": {"poll_interval": 0.05, "mock_step_seconds": 0.1}
+    }
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SALESFORCE_")}
+
+    fake, server = None, None
+    if args.mock:
+        # The server generates the same dataset itself and never leaves the process
+        config["mock_data"] = {"stories": size, "promotions": promotions}
+        story_ids = [f"US-{i:07d}" for i in range(1, 6)]
+        promotion_ids = [f"P-{i:07d}" for i in range(1, min(50, promotions) + 1)]
+    else:
+        started = time.perf_counter()
+        fake = FakeSalesforce(
+            stories=size, promotions=promotions, latency=args.latency,
+            error_rate=args.error_rate, deploy_seconds=0.2
+        )
+        server = serve(fake)
+        print(f"# {size} stories: fake org ready in {time.perf_counter() - started:.1f}s at {server.url}", file=sys.stderr)
+        story_ids = [r["Id"] for r in fake._records["copado__User_Story__c"][:5]]
+        promotion_ids = [r["Id"] for r in fake._records["copado__Promotion__c"][:50]]
+        env.update(SALESFORCE_INSTANCE_URL=server.url, SALESFORCE_ACCESS_TOKEN="benchmark")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(config, f)
+    env["COPADO_MCP_CONFIG"] = f.name
+
+    session = StdioSession(env)
+    results = []
+    try:
+        # Cold start as a host sees it: process spawn to the initialize answer, then the
+        # tool listing and the first call, which builds the client
+        session.call("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "benchmark", "version": "1.0"}})
+        startup = {"initialize": time.perf_counter() - session.started}
+        t0 = time.perf_counter()
+        session.call("tools/list")
+        startup["tools/list"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        _tool(session, "list_promotions", {"format": "compact", "page_size": 1})()
+        startup["first tools/call"] = time.perf_counter() - t0
+        for step, seconds in startup.items():
+            results.append({"records": size, "tool": f"(startup: {step})", "startup_ms": seconds * 1000})
+
+        for label, tool, arguments in scenarios(story_ids, promotion_ids):
+            for i in range(args.warmup):
+                _tool(session, tool, arguments(i))()
+
+            latencies = []
+            for i in range(args.iterations):
+                t0 = time.perf_counter()
+                response = _tool(session, tool, arguments(i))()
+                latencies.append(time.perf_counter() - t0)
+                if "error" in response:
+                    raise RuntimeError(f"{label} failed: {response['error']}")
+
+            # Throughput: keep `concurrency` calls in flight through the dispatcher
+            t0 = time.perf_counter()
+            pending = [_tool(session, tool, arguments(i)) for i in range(args.concurrency)]
+            for wait in pending:
+                wait()
+            elapsed = time.perf_counter() - t0
+
+            results.append({
+                "records": size,
+                "tool": label,
+                "calls": len(latencies),
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "throughput_rps": args.concurrency / elapsed if elapsed else 0.0
+            })
+    finally:
+        session.close()
+        if server:
+            server.shutdown()
+        os.unlink(f.name)
+    if fake:
+        results.append({"records": size, "tool": "(upstream api calls)", "calls": fake.api_calls})
+    return results
+
+
+def report(results: List[Dict[str, Any]]):
+    print(f"{'records':>9}  {'tool':<36} {'calls':>6} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for r in results:
+        if "startup_ms" in r:
+            print(f"{r['records']:>9}  {r['tool']:<36} {'':>6} {r['startup_ms']:>9.2f}")
+            continue
+        if "p50_ms" not in r:
+            print(f"{r['records']:>9}  {r['tool']:<36} {r['calls']:>6}")
+            continue
+        print(f"{r['records']:>9}  {r['tool']:<36} {r['calls']:>6} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['throughput_rps']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Copado MCP server against a local fake Salesforce")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated user story counts")
+    parser.add_argument("--iterations", type=int, default=50, help="Sequential calls per tool for latency percentiles")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32, help="Calls kept in flight for the throughput measurement")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake adds to every Salesforce request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Salesforce requests failed with 503")
+    parser.add_argument("--cache", action="store_true", help="Leave the client read cache enabled")
+    parser.add_argument("--mock", action="store_true", help="Benchmark the in-process mock store instead of the fake Salesforce")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.extend(run_size(size, args))
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
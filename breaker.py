@@ -0,0 +1,76 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Salesforce '{name}' circuit is open after repeated failures; failing fast (next trial in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one kind of Salesforce call.
+
+    closed: calls pass. After failure_threshold consecutive failures it opens, and
+    calls are refused at once with CircuitOpenError. It half-opens when a health probe
+    succeeds or reset_timeout has passed; one trial call is then let through, and its
+    outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, on_open: Optional[Callable[["CircuitBreaker"], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_open = on_open
+        self.state = CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._opened_at + self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(0.0, self._opened_at + self.reset_timeout - now))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._trial = False
+            self.failures += 1
+            opened = self.state != OPEN and (self.state == HALF_OPEN or self.failures >= self.failure_threshold)
+            if opened:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+        if opened and self.on_open:
+            self.on_open(self)
+
+    def probe_succeeded(self):
+        # The org answers again: let the next call through as the trial
+        with self._lock:
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
@@ -1,13 +1,191 @@
 import os
-import requests
-from typing import List, Dict, Any, Optional
-from .mock_data import MockData
+import copy
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Iterator, Tuple, Callable
+from .mock_data import MockStore
+from .config import DEFAULT_CONFIG, _merge
+from .cache import TTLCache, SingleFlight
+from .breaker import CircuitBreaker, CircuitOpenError, OPEN
+from .metrics import Metrics
+from .mirror import CopadoMirror
+from .soql import (
+    USER_STORY_FIELDS, USER_STORY_DEFAULT_FIELDS, PROMOTION_FIELDS, PROMOTION_DEFAULT_FIELDS, PROMOTED_STORY_FIELDS,
+    compile_spec, spec_key, to_soql, to_group_count_soql, map_record, map_flat_record, normalize
+)
+import io
+import csv
 import uuid
 from datetime import datetime
 import json
+import re
+import base64
+from urllib.parse import quote
+import logging
+import threading
+import time
+
+if TYPE_CHECKING:
+    import requests
+
+# Never print(): stdout carries the JSON-RPC stream, so diagnostics go to the logger (stderr)
+logger = logging.getLogger(__name__)
+
+# Page size used by the list tools when the caller does not ask for one.
+# Salesforce returns at most 2000 records per /query batch, so larger pages
+# would span several upstream requests for a single tool call.
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 2000
+
+API_PATH = "/services/data/v60.0"
+# Composite Graph accepts up to 500 nodes per graph (the promotion plus its children);
+# sObject Collections accepts up to 200 records per request.
+GRAPH_NODE_LIMIT = 500
+COLLECTION_CHUNK_SIZE = 200
+
+# What a cursor may carry back: a nextRecordsUrl path on this org's API (it is sent
+# with the session's bearer token) and a Salesforce record Id
+CURSOR_URL = re.compile(rf"{re.escape(API_PATH)}/query(?:All)?/[A-Za-z0-9-]+", re.ASCII)
+RECORD_ID = re.compile(r"[A-Za-z0-9]{15}(?:[A-Za-z0-9]{3})?", re.ASCII)
+# Promotions per detail query, keeping the Id IN (...) list and the subquery rows of one
+# query well inside SOQL's limits
+DETAIL_CHUNK_SIZE = 200
+
+# Promotion statuses that end a deployment; anything else is still in flight. Copado
+# exposes no percentage on the promotion, so in-flight progress is coarse by status.
+DEPLOY_SUCCESS_STATUSES = {"completed"}
+DEPLOY_FAILURE_STATUSES = {"completed with errors", "merge conflict", "cancelled", "error"}
+DEPLOY_PROGRESS = {"scheduled": 10, "in progress": 50, "validated": 80}
+
+# What summarize_pipeline counts: per collection, the object and the fields it groups by
+PIPELINE_GROUPS = {
+    "user_stories": ("copado__User_Story__c", USER_STORY_FIELDS, ["project", "status"]),
+    "promotions": ("copado__Promotion__c", PROMOTION_FIELDS, ["source_env", "target_env", "status"])
+}
+
+# Bulk API 2.0 query job states that end the job without results
+BULK_FAILED_STATES = {"Failed", "Aborted"}
+
+
+class CursorExpiredError(ValueError):
+    pass
+
+
+class ExportError(RuntimeError):
+    pass
+
+
+def _encode_cursor(url: Optional[str], skip: int, last: Optional[str] = None, returned: int = 0) -> str:
+    # Opaque to the caller: the nextRecordsUrl of the batch to resume from
+    # (None = re-run the query) and how many records of it were already returned.
+    # Keyset pages also carry the last Id returned and the running record count.
+    state: Dict[str, Any] = {"url": url, "skip": skip}
+    if last is not None:
+        state.update(last=last, n=returned)
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return {"url": None, "skip": 0, "last": None, "returned": 0}
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        decoded = {"url": state.get("url"), "skip": int(state.get("skip", 0)), "last": state.get("last"), "returned": int(state.get("n", 0))}
+    except Exception:
+        raise ValueError("Invalid cursor")
+    url, last = decoded["url"], decoded["last"]
+    if url is not None and not (isinstance(url, str) and CURSOR_URL.fullmatch(url)):
+        raise ValueError("Invalid cursor")
+    if last is not None and not (isinstance(last, str) and RECORD_ID.fullmatch(last)):
+        raise ValueError("Invalid cursor")
+    if decoded["skip"] < 0 or decoded["returned"] < 0:
+        raise ValueError("Invalid cursor")
+    return decoded
+
+
+def _locator_expired(response: "requests.Response") -> bool:
+    if response.status_code != 400:
+        return False
+    try:
+        return any(error.get("errorCode") == "INVALID_QUERY_LOCATOR" for error in response.json())
+    except Exception:
+        return False
+
+
+def _may_have_committed(error: Exception) -> bool:
+    # A write that was never sent, or that Salesforce answered with an error status,
+    # changed nothing. After a read timeout, a dropped connection or an unreadable
+    # success response it may have been committed.
+    import requests
+    from urllib3.exceptions import NewConnectionError
+    if isinstance(error, (CircuitOpenError, requests.ConnectTimeout, requests.HTTPError)):
+        return False
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return not isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return True
+
+
+def _build_session(access_token: str, settings: Dict[str, Any]) -> "requests.Session":
+    # Imported here: the HTTP stack is most of the import time and mock mode never needs it
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # One keep-alive session per client so consecutive calls reuse pooled TLS connections.
+    # 429/503 mean Salesforce rejected the request before processing it, so retrying is
+    # safe for POST/PATCH too; read errors are not retried to avoid duplicate inserts.
+    retry = Retry(
+        total=settings["max_retries"],
+        connect=settings["max_retries"],
+        read=0,
+        status=settings["max_retries"],
+        status_forcelist=(429, 503),
+        allowed_methods=None,
+        backoff_factor=settings["backoff_factor"],
+        backoff_jitter=settings["backoff_jitter"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings["pool_connections"],
+        pool_maxsize=settings["pool_maxsize"],
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive"
+    })
+    return session
+
+
+def _error_messages(body: Any) -> List[str]:
+    # Composite responses carry errors either as a list of {"message": ...} or inside a
+    # save result's "errors" array
+    if isinstance(body, dict):
+        body = body.get("errors", [])
+    if not isinstance(body, list):
+        return []
+    return [e.get("message", str(e)) if isinstance(e, dict) else str(e) for e in body]
+
+
+def _composite_outcome(user_story_id: str, body: Any, success: bool) -> Dict[str, Any]:
+    record_id = body.get("id") if isinstance(body, dict) else None
+    return {
+        "user_story_id": user_story_id,
+        "success": bool(success and record_id),
+        "id": record_id if success else None,
+        "errors": [] if success else _error_messages(body)
+    }
+
 
 class CopadoClient:
-    def __init__(self, instance_url: Optional[str] = None, access_token: Optional[str] = None, mock: bool = True):
+    def __init__(self, instance_url: Optional[str] = None, access_token: Optional[str] = None, mock: bool = True, config: Optional[Dict[str, Any]] = None, metrics: Optional[Metrics] = None, store: Optional[MockStore] = None):
+        # config is the loaded server config; settings it leaves out keep their defaults
+        config = _merge(copy.deepcopy(DEFAULT_CONFIG), config or {})
         self.mock = mock
         self.instance_url = instance_url
         self.access_token = access_token
@@ -15,181 +193,785 @@ class CopadoClient:
         if self.instance_url and not self.instance_url.startswith("http"):
             self.instance_url = f"https://{self.instance_url}"
         
+        self.http = config["http"]
+        self.deploy = config["deploy"]
+        self.bulk = config["bulk"]
+        self.metrics = metrics or Metrics()
+        self.session: Optional["requests.Session"] = None
+        # Serves mock mode and the fallback when Salesforce is unreachable
+        self.store = store or MockStore.seeded()
+
+        cache = config["cache"]
+        self.cache: Optional[TTLCache] = TTLCache(cache["ttl"], cache["max_entries"]) if cache["enabled"] else None
+        # Identical query batches requested concurrently share one upstream call. Writes
+        # bump the generation so a read started after a write never joins an older one.
+        self._inflight = SingleFlight()
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+        # One breaker per operation, created on first use; a probe thread runs while any is open
+        self.circuit = config["circuit_breaker"]
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breaker_lock = threading.Lock()
+        self._probing = False
+
+        self.environments = config["environments"]
+        self._env_index: Dict[str, str] = {}
+        self._env_loaded_at: Optional[float] = None
+        self._env_lock = threading.Lock()
+
         if not self.mock and self.instance_url and self.access_token:
-            self.headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-            self.base_url = f"{self.instance_url}/services/data/v60.0"
+            self.session = _build_session(self.access_token, self.http)
+            self.base_url = f"{self.instance_url}{API_PATH}"
         else:
             self.mock = True # Force mock if credentials missing
 
-    def _query(self, soql: str) -> List[Dict[str, Any]]:
+        mirror = config["mirror"]
+        self.mirror: Optional[CopadoMirror] = None
+        if not self.mock and mirror["enabled"]:
+            self.mirror = CopadoMirror(mirror["path"], self._query, max_staleness=mirror["max_staleness"])
+
+    def _timeout(self, operation: str) -> Tuple[float, float]:
+        timeouts = self.http["timeouts"]
+        return (timeouts["connect"], timeouts.get(operation, timeouts["query"]))
+
+    def _request(self, method: str, url: str, operation: str, **kwargs) -> "requests.Response":
+        # All Salesforce traffic goes through the pooled session with a per-operation timeout.
+        # While the operation's circuit is open this raises CircuitOpenError without a call.
+        breaker = self._breaker(operation) if self.circuit["enabled"] else None
+        if breaker:
+            breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self._timeout(operation), **kwargs)
+        except Exception:
+            self.metrics.record_upstream(operation, time.perf_counter() - started, error=True)
+            if breaker:
+                breaker.record_failure()
+            raise
+        self.metrics.record_upstream(
+            operation, time.perf_counter() - started,
+            error=response.status_code >= 400,
+            limit_info=response.headers.get("Sforce-Limit-Info")
+        )
+        if breaker:
+            # Other 4xx are the caller's problem, not an outage
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    def _breaker(self, operation: str) -> CircuitBreaker:
+        breaker = self._breakers.get(operation)
+        if breaker is None:
+            with self._breaker_lock:
+                breaker = self._breakers.get(operation)
+                if breaker is None:
+                    breaker = self._breakers[operation] = CircuitBreaker(
+                        operation, self.circuit["failure_threshold"], self.circuit["reset_timeout"], on_open=self._start_probe
+                    )
+        return breaker
+
+    def _start_probe(self, breaker: CircuitBreaker):
+        logger.warning(f"Salesforce '{breaker.name}' calls keep failing; failing fast until it recovers")
+        with self._breaker_lock:
+            if self._probing:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe, name="salesforce-probe", daemon=True).start()
+
+    def _probe(self):
+        # The API versions resource is unauthenticated and runs no query, so polling it
+        # costs nothing; any answer below 500 means the org is reachable again
+        while True:
+            time.sleep(self.circuit["probe_interval"])
+            with self._breaker_lock:
+                opened = [b for b in self._breakers.values() if b.state == OPEN]
+                if not opened:
+                    self._probing = False
+                    return
+            try:
+                healthy = self.session.get(f"{self.instance_url}/services/data/", timeout=self._timeout("query")).status_code < 500
+            except Exception:
+                healthy = False
+            if healthy:
+                for breaker in opened:
+                    breaker.probe_succeeded()
+
+    def circuits(self) -> Dict[str, Dict[str, Any]]:
+        with self._breaker_lock:
+            breakers = list(self._breakers.values())
+        return {b.name: b.to_dict() for b in breakers}
+
+    def _cached(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        # Read-through: only successful Salesforce results are stored, never mock fallbacks
+        if self.cache is None:
+            return loader()
+        value = self.cache.get(key)
+        self.metrics.record_cache(hit=value is not None)
+        if value is None:
+            # A write during the load may have changed what it read; don't cache that result
+            generation = self._generation
+            value = loader()
+            with self._generation_lock:
+                if self._generation == generation:
+                    self.cache.set(key, value)
+        return value
+
+    def _fallback(self, kind: str, key: Tuple, error: Exception, mock: Callable[[], Any]) -> Tuple[Any, Dict[str, Any]]:
+        # Outage path: the last good result for this exact request while the cache still
+        # holds it, otherwise the mock data. The flags tell the caller which it got.
+        stale = self.cache.get_stale(key) if self.cache is not None else None
+        if stale is not None:
+            value, age = stale
+            logger.warning(f"Failed to fetch {kind}: {error}. Serving the cached result from {age:.0f}s ago.")
+            self.metrics.record_stale(kind)
+            return value, {"stale": True, "age_seconds": round(age, 1), "reason": str(error)}
+        logger.warning(f"Failed to fetch {kind}: {error}. Falling back to MOCK.")
+        self.metrics.record_fallback(kind)
+        return mock(), {"degraded": True, "source": "mock", "reason": str(error)}
+
+    def _invalidate(self, *kinds: str):
+        with self._generation_lock:
+            self._generation += 1
+            if self.cache is not None:
+                for kind in kinds:
+                    self.cache.invalidate(kind)
+        if self.mirror is not None:
+            # The next read pulls the change in with a delta sync
+            self.mirror.mark_stale()
+
+    def load_environments(self) -> Dict[str, str]:
+        # One query refreshes the whole Name -> Id index; environments rarely change
+        if self.mock:
+            index = {name: name for name in self.store.environments()}
+        elif self.mirror:
+            self.mirror.ensure_fresh()
+            index = self.mirror.environments()
+        else:
+            index = {e["Name"]: e["Id"] for e in self._query("SELECT Id, Name FROM copado__Environment__c")}
+        with self._env_lock:
+            self._env_index = index
+            self._env_loaded_at = time.monotonic()
+        return index
+
+    def preload_environments(self):
+        try:
+            self.load_environments()
+        except Exception as e:
+            logger.warning(f"Failed to preload environments: {e}")
+
+    def resolve_environment(self, name: str) -> str:
+        with self._env_lock:
+            index = self._env_index
+            age = None if self._env_loaded_at is None else time.monotonic() - self._env_loaded_at
+
+        stale = age is None or age > self.environments["ttl"]
+        miss = name not in index and (age is None or age > self.environments["refresh_on_miss_after"])
+        if stale or miss:
+            try:
+                index = self.load_environments()
+            except Exception as e:
+                if not index:
+                    raise
+                logger.warning(f"Failed to refresh environments: {e}. Using cached index.")
+
+        if name not in index:
+            raise ValueError(f"Invalid environment '{name}'. Available: {sorted(index)}")
+        return index[name]
+
+    def _query_batches(self, soql: str, url: Optional[str] = None, include_deleted: bool = False) -> Iterator[Tuple[Optional[str], List[Dict[str, Any]], Optional[str], int]]:
+        # Yields (batch_url, records, next_records_url, total_size) for each batch of the result,
+        # following nextRecordsUrl until Salesforce reports the query as done.
+        # batch_url is None for the first batch of a fresh query. include_deleted uses
+        # queryAll so deleted records come back with IsDeleted = true.
+        while True:
+            key = (self._generation, include_deleted, normalize(soql)) if url is None else (self._generation, url)
+            try:
+                body, shared = self._inflight.do(key, lambda url=url: self._fetch_batch(soql, url, include_deleted))
+            except (CircuitOpenError, CursorExpiredError):
+                raise
+            except Exception as e:
+                logger.error(f"Salesforce Query Error: {e}")
+                raise
+            if shared:
+                self.metrics.record_coalesced("query")
+
+            next_url = None if body.get("done", True) else body.get("nextRecordsUrl")
+            yield url, body.get("records", []), next_url, body.get("totalSize", 0)
+            if not next_url:
+                return
+            url = next_url
+
+    def _fetch_batch(self, soql: str, url: Optional[str], include_deleted: bool) -> Dict[str, Any]:
+        if url is None:
+            response = self._request("GET", f"{self.base_url}/{'queryAll' if include_deleted else 'query'}", "query", params={"q": soql})
+        else:
+            response = self._request("GET", f"{self.instance_url}{url}", "query")
+            if _locator_expired(response):
+                raise CursorExpiredError("cursor expired; restart without cursor")
+        response.raise_for_status()
+        return response.json()
+
+    def _query(self, soql: str, include_deleted: bool = False) -> Iterator[Dict[str, Any]]:
+        # Lazily streams every record of the query, one batch in memory at a time.
         if self.mock:
-            return []
+            return
+        for _, records, _, _ in self._query_batches(soql, include_deleted=include_deleted):
+            yield from records
+
+    def _fetch_all(self, soql: str, catalog: Dict[str, str], fields: List[str]) -> List[Dict[str, Any]]:
+        # REST paging for ordinary full-list reads; the export tools use Bulk API jobs instead
+        return [map_record(r, catalog, fields) for r in self._query(soql)]
+
+    def _bulk_job(self, soql: str) -> str:
+        # Creates a Bulk API 2.0 query job and waits until Salesforce has run it
+        resp = self._request("POST", f"{self.base_url}/jobs/query", "bulk", json={"operation": "query", "query": soql, "contentType": "CSV", "columnDelimiter": "COMMA", "lineEnding": "LF"})
+        resp.raise_for_status()
+        job_id = resp.json()["id"]
+        job_url = f"{self.base_url}/jobs/query/{quote(job_id, safe='')}"
+        deadline = time.monotonic() + self.bulk["timeout"]
+        while True:
+            resp = self._request("GET", job_url, "bulk")
+            resp.raise_for_status()
+            job = resp.json()
+            if job["state"] == "JobComplete":
+                return job_id
+            if job["state"] in BULK_FAILED_STATES:
+                raise RuntimeError(f"Bulk query job {job_id} {job['state'].lower()}: {job.get('errorMessage')}")
+            if time.monotonic() > deadline:
+                self._request("PATCH", job_url, "bulk", json={"state": "Aborted"})
+                raise TimeoutError(f"Bulk query job {job_id} did not finish within {self.bulk['timeout']}s")
+            time.sleep(self.bulk["poll_interval"])
+
+    def _bulk_rows(self, job_id: str) -> Iterator[Dict[str, str]]:
+        # Streams the CSV result pages, parsing rows as the bytes arrive. Sforce-Locator
+        # chains the pages and is "null" after the last one.
+        locator = None
+        while True:
+            params: Dict[str, Any] = {"maxRecords": self.bulk["max_records"]}
+            if locator:
+                params["locator"] = locator
+            resp = self._request("GET", f"{self.base_url}/jobs/query/{quote(job_id, safe='')}/results", "bulk", params=params, stream=True)
+            try:
+                resp.raise_for_status()
+                # TextIOWrapper reads again after EOF, which fails if urllib3 has closed the stream
+                resp.raw.decode_content = True
+                resp.raw.auto_close = False
+                yield from csv.DictReader(io.TextIOWrapper(resp.raw, encoding="utf-8", newline=""))
+            finally:
+                resp.close()
+            locator = resp.headers.get("Sforce-Locator")
+            if not locator or locator == "null":
+                return
+
+    @staticmethod
+    def _keyset_query(sobject: str, catalog: Dict[str, str], spec: Dict[str, Any]) -> Tuple[str, Optional[Callable[[str, int], Optional[str]]]]:
+        # Pages without an explicit order run in Id order, so a cursor whose query locator
+        # Salesforce has dropped can resume after its last Id. Returns (soql, resume), where
+        # resume(last_id, returned) is the query for the rest (None once the limit is used up).
+        if spec["order_by"] and spec["order_by"] != [("id", "ASC")]:
+            return to_soql(sobject, catalog, spec), None
+        spec = dict(spec, order_by=[("id", "ASC")])
+
+        def resume(last_id: str, returned: int) -> Optional[str]:
+            if spec["limit"] and returned >= spec["limit"]:
+                return None
+            remaining = spec["limit"] - returned if spec["limit"] else None
+            return to_soql(sobject, catalog, dict(spec, limit=remaining), after_id=last_id)
+
+        return to_soql(sobject, catalog, spec), resume
+
+    def _query_page(self, soql: str, mapper: Callable[[Dict[str, Any]], Dict[str, Any]], state: Dict[str, Any], page_size: int, resume: Optional[Callable[[str, int], Optional[str]]] = None) -> Dict[str, Any]:
+        url, skip, last, returned = state["url"], state["skip"], state["last"], state["returned"]
+        if resume and url is None and last is not None:
+            soql, skip = resume(last, returned), 0
+            if soql is None:
+                return {"records": [], "next_cursor": None}
+        records: List[Dict[str, Any]] = []
+
+        def cursor(url: Optional[str], skip: int) -> str:
+            if not resume:
+                return _encode_cursor(url, skip)
+            # Without a locator to follow, the next page is a keyset query rather than a re-run
+            return _encode_cursor(url, skip if url else 0, last, returned + len(records))
+
+        try:
+            for batch_url, batch, next_url, _ in self._query_batches(soql, url):
+                chunk = batch[skip:skip + page_size - len(records)]
+                records.extend(mapper(r) for r in chunk)
+                if chunk:
+                    last = chunk[-1]["Id"]
+                if len(records) >= page_size:
+                    consumed = skip + len(chunk)
+                    if consumed < len(batch):
+                        return {"records": records, "next_cursor": cursor(batch_url, consumed)}
+                    if next_url:
+                        return {"records": records, "next_cursor": cursor(next_url, 0)}
+                    break
+                skip = 0
+        except CursorExpiredError:
+            if not resume or last is None:
+                raise
+            logger.info(f"Query locator expired; resuming after Id {last}")
+            if records:
+                return {"records": records, "next_cursor": cursor(None, 0)}
+            return self._query_page(soql, mapper, dict(state, url=None, last=last), page_size, resume)
+        return {"records": records, "next_cursor": None}
+
+    @staticmethod
+    def _offset_page(fetch: Callable[[int, int], List[Dict[str, Any]]], state: Dict[str, Any], page_size: int, limit: Optional[int] = None) -> Dict[str, Any]:
+        # fetch(offset, limit) reads from a local store; one extra row tells us whether
+        # another page exists. limit caps the rows returned across all pages.
+        start = state["skip"]
+        want = page_size + 1
+        if limit:
+            want = max(0, min(want, limit - start))
+        rows = fetch(start, want) if want else []
+        more = len(rows) > page_size
+        return {"records": rows[:page_size], "next_cursor": _encode_cursor(None, start + page_size) if more else None}
+
+    def _mock_fetch(self, collection: str, spec: Dict[str, Any]) -> Callable[[int, int], List[Dict[str, Any]]]:
+        return lambda offset, limit: self.store.select(collection, spec, offset, limit)
+
+    @staticmethod
+    def user_story_spec(
+        status: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        project: Optional[str] = None,
+        priority: Optional[str] = None,
+        created_after: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return compile_spec(
+            USER_STORY_FIELDS, USER_STORY_DEFAULT_FIELDS,
+            filters={"status": ([status] if status else []) + list(statuses or []), "project": project, "priority": priority},
+            created_after=created_after, fields=fields, order_by=order_by, limit=limit
+        )
+
+    @staticmethod
+    def promotion_spec(
+        status: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        source_env: Optional[str] = None,
+        target_env: Optional[str] = None,
+        created_after: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return compile_spec(
+            PROMOTION_FIELDS, PROMOTION_DEFAULT_FIELDS,
+            filters={"status": ([status] if status else []) + list(statuses or []), "source_env": source_env, "target_env": target_env},
+            created_after=created_after, fields=fields, order_by=order_by, limit=limit
+        )
+
+    def get_user_stories(self, status: Optional[str] = None, **query) -> List[Dict[str, Any]]:
+        spec = self.user_story_spec(status, **query)
+        if self.mock:
+            return self.store.select("USER_STORIES", spec)
         
+        key = ("user_stories", spec_key(spec))
         try:
-            params = {"q": soql}
-            response = requests.get(f"{self.base_url}/query", headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json().get("records", [])
+            if self.mirror:
+                self.mirror.ensure_fresh()
+                return self.mirror.user_stories(spec, limit=spec["limit"] or -1)
+            # Query copado__User_Story__c, mapping each record as its batch arrives
+            return self._cached(
+                key,
+                lambda: self._fetch_all(to_soql("copado__User_Story__c", USER_STORY_FIELDS, spec), USER_STORY_FIELDS, spec["fields"])
+            )
         except Exception as e:
-            print(f"Salesforce Query Error: {e}")
+            return self._fallback("user_stories", key, e, lambda: self.store.select("USER_STORIES", spec))[0]
+
+    def get_user_stories_page(self, status: Optional[str] = None, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE, **query) -> Dict[str, Any]:
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        state = _decode_cursor(cursor)
+        spec = self.user_story_spec(status, **query)
+        if self.mock:
+            return self._offset_page(self._mock_fetch("USER_STORIES", spec), state, page_size, spec["limit"])
+
+        key = ("user_stories", spec_key(spec), cursor, page_size)
+        try:
+            if self.mirror:
+                stale = self.mirror.ensure_fresh()
+                page = self._offset_page(lambda offset, limit: self.mirror.user_stories(spec, offset, limit), state, page_size, spec["limit"])
+                return dict(page, **stale) if stale else page
+            soql, resume = self._keyset_query("copado__User_Story__c", USER_STORY_FIELDS, spec)
+            return self._cached(
+                key,
+                lambda: self._query_page(soql, lambda r: map_record(r, USER_STORY_FIELDS, spec["fields"]), state, page_size, resume)
+            )
+        except CursorExpiredError:
             raise
+        except Exception as e:
+            page, flags = self._fallback("user_stories", key, e, lambda: self._offset_page(self._mock_fetch("USER_STORIES", spec), state, page_size, spec["limit"]))
+            return dict(page, **flags)
 
-    def get_user_stories(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_promotions(self, **query) -> List[Dict[str, Any]]:
+        spec = self.promotion_spec(**query)
         if self.mock:
-            stories = MockData.USER_STORIES
-            if status:
-                return [s for s in stories if s["status"].lower() == status.lower()]
-            return stories
+            return self.store.select("PROMOTIONS", spec)
         
+        key = ("promotions", spec_key(spec))
         try:
-            # Query copado__User_Story__c
-            # Adjust fields as necessary based on actual Org schema. 
-            # Assuming standard Copado package fields.
-            query = "SELECT Id, Name, copado__User_Story_Title__c, copado__Status__c, copado__Priority__c, copado__Project__r.Name FROM copado__User_Story__c"
-            if status:
-                query += f" WHERE copado__Status__c = '{status}'"
-            
-            records = self._query(query)
-            
-            # Map to simplified format
-            return [
-                {
-                    "id": r["Id"],
-                    "name": r["Name"],
-                    "title": r.get("copado__User_Story_Title__c"),
-                    "status": r.get("copado__Status__c"),
-                    "priority": r.get("copado__Priority__c"),
-                    "project": r.get("copado__Project__r", {}).get("Name") if r.get("copado__Project__r") else None
-                }
-                for r in records
-            ]
+            if self.mirror:
+                self.mirror.ensure_fresh()
+                return self.mirror.promotions(spec, limit=spec["limit"] or -1)
+            return self._cached(
+                key,
+                lambda: self._fetch_all(to_soql("copado__Promotion__c", PROMOTION_FIELDS, spec), PROMOTION_FIELDS, spec["fields"])
+            )
         except Exception as e:
-            print(f"Failed to fetch user stories: {e}. Falling back to MOCK.")
-            return self.get_user_stories(status=status) # Fallback to mock logic (recursive but with mock=True implicitly handled if we set self.mock? No, we need to explicitly call mock logic)
-            # Actually, let's just return mock data here directly to be safe
-            stories = MockData.USER_STORIES
-            if status:
-                return [s for s in stories if s["status"].lower() == status.lower()]
-            return stories
-
-    def get_promotions(self) -> List[Dict[str, Any]]:
+            return self._fallback("promotions", key, e, lambda: self.store.select("PROMOTIONS", spec))[0]
+
+    def get_promotions_page(self, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE, **query) -> Dict[str, Any]:
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        state = _decode_cursor(cursor)
+        spec = self.promotion_spec(**query)
         if self.mock:
-            return MockData.PROMOTIONS
-        
+            return self._offset_page(self._mock_fetch("PROMOTIONS", spec), state, page_size, spec["limit"])
+
+        key = ("promotions", spec_key(spec), cursor, page_size)
         try:
-            query = "SELECT Id, Name, copado__Status__c, copado__Source_Environment__r.Name, copado__Destination_Environment__r.Name FROM copado__Promotion__c"
-            records = self._query(query)
-            
-            return [
-                {
-                    "id": r["Id"],
-                    "name": r["Name"],
-                    "status": r.get("copado__Status__c"),
-                    "source_env": r.get("copado__Source_Environment__r", {}).get("Name"),
-                    "target_env": r.get("copado__Destination_Environment__r", {}).get("Name")
-                }
-                for r in records
-            ]
+            if self.mirror:
+                stale = self.mirror.ensure_fresh()
+                page = self._offset_page(lambda offset, limit: self.mirror.promotions(spec, offset, limit), state, page_size, spec["limit"])
+                return dict(page, **stale) if stale else page
+            soql, resume = self._keyset_query("copado__Promotion__c", PROMOTION_FIELDS, spec)
+            return self._cached(
+                key,
+                lambda: self._query_page(soql, lambda r: map_record(r, PROMOTION_FIELDS, spec["fields"]), state, page_size, resume)
+            )
+        except CursorExpiredError:
+            raise
+        except Exception as e:
+            page, flags = self._fallback("promotions", key, e, lambda: self._offset_page(self._mock_fetch("PROMOTIONS", spec), state, page_size, spec["limit"]))
+            return dict(page, **flags)
+
+    def summarize_pipeline(self, project: Optional[str] = None, created_after: Optional[str] = None) -> Dict[str, Any]:
+        # Record counts per status and project (user stories) and per environment pair and
+        # status (promotions), counted by Salesforce rather than by reading the records
+        specs = {
+            "user_stories": self.user_story_spec(project=project, created_after=created_after),
+            "promotions": self.promotion_spec(created_after=created_after)
+        }
+        return {kind: self._group_counts(kind, spec) for kind, spec in specs.items()}
+
+    def _group_counts(self, kind: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        sobject, catalog, group_by = PIPELINE_GROUPS[kind]
+        flags: Optional[Dict[str, Any]] = None
+        if self.mock:
+            counts = self.store.group_count(kind.upper(), spec, group_by)
+        else:
+            key = (kind, "summary", spec_key(spec))
+            try:
+                if self.mirror:
+                    flags = self.mirror.ensure_fresh()
+                    counts = self.mirror.group_count(kind, spec, group_by)
+                else:
+                    # Aggregate queries return at most 2000 groups, far more than these produce
+                    counts = self._cached(key, lambda: {
+                        tuple(r.get(name) for name in group_by): r["total"]
+                        for r in self._query(to_group_count_soql(sobject, catalog, spec, group_by))
+                    })
+            except Exception as e:
+                counts, flags = self._fallback(kind, key, e, lambda: self.store.group_count(kind.upper(), spec, group_by))
+
+        rows = sorted(
+            ([*group, count] for group, count in counts.items()),
+            key=lambda row: [(value is not None, value or "") for value in row[:-1]]
+        )
+        table = {"fields": group_by + ["count"], "rows": rows, "total": sum(counts.values())}
+        return dict(table, **flags) if flags else table
+
+    def get_promotion_details(self, promotion_ids: List[str]) -> Dict[str, Any]:
+        # Headers plus promoted user stories for many promotions, one relationship query
+        # per DETAIL_CHUNK_SIZE ids rather than one call per promotion
+        ids = list(dict.fromkeys(promotion_ids))
+        if not ids:
+            raise ValueError("promotion_ids must not be empty")
+        flags: Optional[Dict[str, Any]] = None
+        if self.mock:
+            details = self._mock_promotion_details(ids)
+        else:
+            key = ("promotions", "details", tuple(ids))
+            try:
+                if self.mirror:
+                    flags = self.mirror.ensure_fresh()
+                    details = self.mirror.promotion_details(ids)
+                else:
+                    details = self._cached(key, lambda: self._fetch_promotion_details(ids))
+            except Exception as e:
+                details, flags = self._fallback("promotion_details", key, e, lambda: self._mock_promotion_details(ids))
+
+        # Salesforce accepts 15-character Ids too but always returns the 18-character form
+        found = {d["id"]: d for d in details}
+        found.update((d["id"][:15], d) for d in details if len(d["id"]) == 18 and d["id"][:15] not in found)
+        result = {
+            "promotions": [found[i] for i in ids if i in found],
+            "not_found": [i for i in ids if i not in found]
+        }
+        return dict(result, **flags) if flags else result
+
+    def _fetch_promotion_details(self, ids: List[str]) -> List[Dict[str, Any]]:
+        stories = to_soql("copado__Promoted_User_Stories__r", PROMOTED_STORY_FIELDS, compile_spec(PROMOTED_STORY_FIELDS, list(PROMOTED_STORY_FIELDS)))
+        details = []
+        for start in range(0, len(ids), DETAIL_CHUNK_SIZE):
+            spec = compile_spec(PROMOTION_FIELDS, list(PROMOTION_FIELDS), filters={"id": ids[start:start + DETAIL_CHUNK_SIZE]})
+            for r in self._query(to_soql("copado__Promotion__c", PROMOTION_FIELDS, spec, subqueries=[stories])):
+                promotion = map_record(r, PROMOTION_FIELDS, spec["fields"])
+                promotion["user_stories"] = [
+                    map_record(child, PROMOTED_STORY_FIELDS, list(PROMOTED_STORY_FIELDS))
+                    for child in self._subquery_records(stories, r.get("copado__Promoted_User_Stories__r"))
+                ]
+                details.append(promotion)
+        return details
+
+    def _subquery_records(self, soql: str, result: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        # A subquery result is null when there are no children; a large one is paged
+        # through its own nextRecordsUrl
+        if not result:
+            return
+        yield from result.get("records", [])
+        if not result.get("done", True) and result.get("nextRecordsUrl"):
+            for _, records, _, _ in self._query_batches(soql, url=result["nextRecordsUrl"]):
+                yield from records
+
+    def _mock_promotion_details(self, ids: List[str]) -> List[Dict[str, Any]]:
+        details = []
+        for promotion_id in ids:
+            promotion = self.store.get("PROMOTIONS", promotion_id)
+            if promotion is None:
+                continue
+            stories = []
+            for story_id in promotion.get("user_stories", []):
+                story = self.store.get("USER_STORIES", story_id) or {}
+                stories.append({"id": story_id, "name": story.get("name"), "title": story.get("title")})
+            details.append(dict(promotion, user_stories=stories))
+        return details
+
+    def export_user_stories(self, status: Optional[str] = None, **query) -> Iterator[Dict[str, Any]]:
+        return self._export("copado__User_Story__c", USER_STORY_FIELDS, "user_stories", self.user_story_spec(status, **query))
+
+    def export_promotions(self, **query) -> Iterator[Dict[str, Any]]:
+        return self._export("copado__Promotion__c", PROMOTION_FIELDS, "promotions", self.promotion_spec(**query))
+
+    def _export(self, sobject: str, catalog: Dict[str, str], kind: str, spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Full exports always run as a Bulk API 2.0 job in real mode. An export never
+        # substitutes mock rows: a failure, before or while streaming, raises ExportError.
+        if self.mock:
+            return iter(self.store.select(kind.upper(), spec))
+        try:
+            if self.mirror:
+                self.mirror.ensure_fresh()
+                return iter(getattr(self.mirror, kind)(spec, limit=spec["limit"] or -1))
+            job_id = self._bulk_job(to_soql(sobject, catalog, spec))
         except Exception as e:
-            print(f"Failed to fetch promotions: {e}. Falling back to MOCK.")
-            return MockData.PROMOTIONS
+            logger.error(f"Failed to export {kind}: {e}")
+            raise ExportError(f"Export of {kind} failed: {e}") from e
+        return self._export_rows(job_id, catalog, kind, spec)
+
+    def _export_rows(self, job_id: str, catalog: Dict[str, str], kind: str, spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        try:
+            for row in self._bulk_rows(job_id):
+                yield map_flat_record(row, catalog, spec["fields"])
+        except Exception as e:
+            logger.error(f"Failed to export {kind}: {e}")
+            raise ExportError(f"Export of {kind} failed: {e}") from e
 
     def create_promotion(self, source_env: str, target_env: str, user_story_ids: List[str]) -> Dict[str, Any]:
+        # Validate environments against the local index before any Salesforce call
+        source_env_id = self.resolve_environment(source_env)
+        target_env_id = self.resolve_environment(target_env)
+
         if self.mock:
-            # ... (Mock logic same as before) ...
-            # Validate environments
-            if source_env not in MockData.ENVIRONMENTS or target_env not in MockData.ENVIRONMENTS:
-                raise ValueError(f"Invalid environment. Available: {MockData.ENVIRONMENTS}")
-            
             new_promotion = {
-                "id": f"P-{uuid.uuid4().hex[:4].upper()}",
+                "id": f"P-{uuid.uuid4().hex[:8].upper()}",
                 "source_env": source_env,
                 "target_env": target_env,
                 "status": "Draft",
                 "user_stories": user_story_ids,
                 "created_at": datetime.utcnow().isoformat() + "Z"
             }
-            MockData.PROMOTIONS.append(new_promotion)
-            return new_promotion
-        
+            return self.store.insert("PROMOTIONS", new_promotion)
+
+        # Create the Promotion and its copado__Promoted_User_Story__c children.
+        # User story ids are assumed to be Salesforce Ids. Writes never fall back to
+        # mock data: a made-up id would hide whatever did reach the org.
+        payload = {
+            "copado__Source_Environment__c": source_env_id,
+            "copado__Destination_Environment__c": target_env_id,
+            "copado__Status__c": "Draft"
+        }
+
+        if len(user_story_ids) < GRAPH_NODE_LIMIT:
+            try:
+                result = self._create_promotion_graph(payload, user_story_ids)
+            except Exception as e:
+                return self._create_failed(e)
+            self._invalidate("promotions")
+            return result
+
+        # Too many children for one graph: insert the header, then the children
+        # in all-or-none sObject Collections chunks
         try:
-            # 1. Resolve Environment Ids (Mocking this step or assuming names match for now? 
-            # In real life we need to query copado__Environment__c to get IDs from Names)
-            # For simplicity, let's try to query them.
-            env_query = f"SELECT Id, Name FROM copado__Environment__c WHERE Name IN ('{source_env}', '{target_env}')"
-            envs = self._query(env_query)
-            env_map = {e["Name"]: e["Id"] for e in envs}
-            
-            source_env_id = env_map.get(source_env)
-            target_env_id = env_map.get(target_env)
-            
-            if not source_env_id or not target_env_id:
-                raise ValueError(f"Could not find environment IDs for {source_env} or {target_env}")
-
-            # 2. Create Promotion Record
-            payload = {
-                "copado__Source_Environment__c": source_env_id,
-                "copado__Destination_Environment__c": target_env_id,
-                "copado__Status__c": "Draft"
-            }
-            
-            resp = requests.post(f"{self.base_url}/sobjects/copado__Promotion__c", headers=self.headers, json=payload)
+            resp = self._request("POST", f"{self.base_url}/sobjects/copado__Promotion__c", "create", json=payload)
             resp.raise_for_status()
             promo_id = resp.json()["id"]
-            
-            # 3. Link User Stories (Update User Story records to point to this Promotion? 
-            # Or create Promoted User Story records? Copado usually uses copado__Promoted_User_Story__c)
-            # Let's try to create copado__Promoted_User_Story__c items.
-            
-            # First need to get User Story Ids from the input list (assuming input is IDs or Names? 
-            # The tool def says IDs. If they are Salesforce IDs, good. If they are Names (US-001), need to query.)
-            # Let's assume they are Salesforce IDs for now to keep it simple, or try to resolve them.
-            
-            for us_id in user_story_ids:
-                pus_payload = {
+        except Exception as e:
+            return self._create_failed(e)
+
+        outcomes, error = self._create_promoted_stories(promo_id, user_story_ids)
+        self._invalidate("promotions")
+        linked = sum(1 for o in outcomes if o["success"])
+        result = {
+            "id": promo_id,
+            "status": "Draft",
+            "message": f"Promotion created in Salesforce; {linked} of {len(user_story_ids)} user stories linked",
+            "user_stories": outcomes
+        }
+        if error is not None:
+            # The header exists, so report it with what was linked rather than hiding it
+            logger.warning(f"Linking user stories to promotion {promo_id} stopped: {error}")
+            result["message"] += f"; linking stopped after {len(outcomes)}: {error}"
+            if _may_have_committed(error):
+                result["message"] += " (the last chunk may have been linked; check the promotion before retrying)"
+            result["not_linked"] = user_story_ids[len(outcomes):]
+        return result
+
+    @staticmethod
+    def _create_failed(error: Exception) -> Dict[str, Any]:
+        logger.warning(f"Failed to create promotion in Salesforce: {error}")
+        if _may_have_committed(error):
+            return {
+                "id": None,
+                "status": "Unknown",
+                "message": f"No answer from Salesforce ({error}); the promotion may have been created, check before retrying"
+            }
+        return {"id": None, "status": "Error", "message": f"Promotion was not created: {error}"}
+
+    def _create_promotion_graph(self, payload: Dict[str, Any], user_story_ids: List[str]) -> Dict[str, Any]:
+        # One Composite Graph round trip; the graph is transactional, so either the
+        # promotion and every child are created or nothing is.
+        nodes = [{
+            "method": "POST",
+            "url": f"{API_PATH}/sobjects/copado__Promotion__c",
+            "referenceId": "promotion",
+            "body": payload
+        }]
+        for i, us_id in enumerate(user_story_ids):
+            nodes.append({
+                "method": "POST",
+                "url": f"{API_PATH}/sobjects/copado__Promoted_User_Story__c",
+                "referenceId": f"story{i}",
+                "body": {"copado__Promotion__c": "@{promotion.id}", "copado__User_Story__c": us_id}
+            })
+
+        resp = self._request("POST", f"{self.base_url}/composite/graph", "create", json={"graphs": [{"graphId": "promotion", "compositeRequest": nodes}]})
+        resp.raise_for_status()
+        graph = resp.json()["graphs"][0]
+        results = {r["referenceId"]: r for r in graph["graphResponse"]["compositeResponse"]}
+
+        outcomes = []
+        for i, us_id in enumerate(user_story_ids):
+            result = results.get(f"story{i}", {})
+            outcomes.append(_composite_outcome(us_id, result.get("body"), graph["isSuccessful"]))
+
+        if not graph["isSuccessful"]:
+            promotion_errors = _error_messages(results.get("promotion", {}).get("body"))
+            return {
+                "id": None,
+                "status": "Failed",
+                "message": "Promotion was not created; Salesforce rolled back the request",
+                "errors": promotion_errors,
+                "user_stories": outcomes
+            }
+
+        return {
+            "id": results["promotion"]["body"]["id"],
+            "status": "Draft",
+            "message": "Promotion created in Salesforce",
+            "user_stories": outcomes
+        }
+
+    def _create_promoted_stories(self, promo_id: str, user_story_ids: List[str]) -> Tuple[List[Dict[str, Any]], Optional[Exception]]:
+        # Stops at the first chunk whose request fails, returning the outcomes so far
+        # with the error; later chunks are not attempted
+        outcomes = []
+        for start in range(0, len(user_story_ids), COLLECTION_CHUNK_SIZE):
+            chunk = user_story_ids[start:start + COLLECTION_CHUNK_SIZE]
+            records = [
+                {
+                    "attributes": {"type": "copado__Promoted_User_Story__c"},
                     "copado__Promotion__c": promo_id,
                     "copado__User_Story__c": us_id
                 }
-                requests.post(f"{self.base_url}/sobjects/copado__Promoted_User_Story__c", headers=self.headers, json=pus_payload)
+                for us_id in chunk
+            ]
+            try:
+                resp = self._request("POST", f"{self.base_url}/composite/sobjects", "create", json={"allOrNone": True, "records": records})
+                resp.raise_for_status()
+            except Exception as e:
+                return outcomes, e
+            for us_id, result in zip(chunk, resp.json()):
+                outcomes.append(_composite_outcome(us_id, result, result.get("success", False)))
+        return outcomes, None
 
-            return {"id": promo_id, "status": "Draft", "message": "Promotion created in Salesforce"}
+    def _promotion_status(self, promotion_id: str) -> Optional[str]:
+        resp = self._request("GET", f"{self.base_url}/sobjects/copado__Promotion__c/{quote(promotion_id, safe='')}", "query", params={"fields": "copado__Status__c"})
+        resp.raise_for_status()
+        return resp.json().get("copado__Status__c")
 
-        except Exception as e:
-            print(f"Failed to create promotion in Salesforce: {e}. Falling back to MOCK.")
-            # Fallback mock logic
-            new_promotion = {
-                "id": f"P-{uuid.uuid4().hex[:4].upper()}",
-                "source_env": source_env,
-                "target_env": target_env,
-                "status": "Draft",
-                "user_stories": user_story_ids,
-                "created_at": datetime.utcnow().isoformat() + "Z"
-            }
-            MockData.PROMOTIONS.append(new_promotion)
-            return new_promotion
-
-    def deploy_promotion(self, promotion_id: str) -> Dict[str, Any]:
+    def deploy_promotion(self, promotion_id: str, progress: Optional[Callable[[int, str], None]] = None, stop: Optional[threading.Event] = None) -> Dict[str, Any]:
+        # Triggers the deployment and blocks until the promotion reaches a final status,
+        # reporting (percent, status) along the way. The server runs this as a background
+        # job, so tool calls are not held up by it; setting stop ends the wait early.
+        report = progress or (lambda percent, status: None)
+        stop = stop or threading.Event()
         if self.mock:
-            # ... (Mock logic) ...
-            for promo in MockData.PROMOTIONS:
-                if promo["id"] == promotion_id:
-                    promo["status"] = "Completed"
-                    return {"status": "Success", "promotion": promo}
-            raise ValueError(f"Promotion {promotion_id} not found")
+            if self.store.get("PROMOTIONS", promotion_id) is None:
+                raise ValueError(f"Promotion {promotion_id} not found")
+            for status in ("Scheduled", "In Progress"):
+                self.store.update("PROMOTIONS", promotion_id, status=status)
+                report(DEPLOY_PROGRESS[status.lower()], status)
+                if stop.wait(self.deploy["mock_step_seconds"]):
+                    return {"id": promotion_id, "status": "Error", "message": "Stopped before the deployment finished"}
+            promo = self.store.update("PROMOTIONS", promotion_id, status="Completed")
+            report(100, "Completed")
+            return {"status": "Success", "promotion": promo}
             
         try:
-            # In Copado, "Deploying" usually means checking "Deploy" checkbox or creating a Deployment.
-            # Let's try updating the status to "Scheduled" or "Completed" just to demonstrate update.
-            # Or check a "copado__Create_Deployment__c" checkbox if it exists.
-            
-            payload = {"copado__Status__c": "Completed"} # Simplified
-            resp = requests.patch(f"{self.base_url}/sobjects/copado__Promotion__c/{promotion_id}", headers=self.headers, json=payload)
+            # Scheduling the promotion hands it to Copado's deployment engine; from then on
+            # its copado__Status__c tracks the deployment.
+            payload = {"copado__Status__c": "Scheduled"}
+            resp = self._request("PATCH", f"{self.base_url}/sobjects/copado__Promotion__c/{quote(promotion_id, safe='')}", "update", json=payload)
             resp.raise_for_status()
-            
-            return {"id": promotion_id, "status": "Completed", "message": "Promotion status updated in Salesforce"}
+            # Deploying changes the promotion and moves its stories along the pipeline
+            self._invalidate("promotions", "user_stories")
+            report(DEPLOY_PROGRESS["scheduled"], "Scheduled")
+
+            deadline = time.monotonic() + self.deploy["timeout"]
+            while True:
+                if stop.wait(self.deploy["poll_interval"]):
+                    # Copado keeps deploying; only this server stops following it
+                    return {"id": promotion_id, "status": "Error", "message": "Stopped waiting for the deployment; check the promotion's status in Copado"}
+                status = self._promotion_status(promotion_id) or ""
+                if status.lower() in DEPLOY_SUCCESS_STATUSES:
+                    break
+                if status.lower() in DEPLOY_FAILURE_STATUSES:
+                    self._invalidate("promotions", "user_stories")
+                    return {"id": promotion_id, "status": "Error", "promotion_status": status, "message": f"Deployment finished with status {status}"}
+                if time.monotonic() > deadline:
+                    return {"id": promotion_id, "status": "Error", "promotion_status": status, "message": f"Timed out after {self.deploy['timeout']}s waiting for the deployment"}
+                report(DEPLOY_PROGRESS.get(status.lower(), DEPLOY_PROGRESS["in progress"]), status)
+
+            self._invalidate("promotions", "user_stories")
+            report(100, status)
+            return {"id": promotion_id, "status": "Completed", "message": "Promotion deployed in Salesforce"}
         except Exception as e:
-            print(f"Failed to deploy promotion in Salesforce: {e}. Falling back to MOCK.")
+            logger.warning(f"Failed to deploy promotion in Salesforce: {e}")
             return {"status": "Error", "message": str(e)}
@@ -0,0 +1,140 @@
+import os
+import json
+import copy
+from typing import Any, Dict, Optional
+
+# Every tunable the server understands, with its default. A JSON file named by
+# COPADO_MCP_CONFIG is merged on top of this, section by section.
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "server": {
+        # Worker threads running tools/call handlers concurrently
+        "max_workers": 8,
+        # tools/call requests admitted (queued + running) before stdin reads pause
+        "max_pending": 64,
+        # Output of the list tools when the caller passes no format: pretty, compact or columnar
+        "default_format": "pretty"
+    },
+    "cache": {
+        # Read-through cache for list queries in real mode; writes invalidate it
+        "enabled": True,
+        "ttl": 30,
+        "max_entries": 256
+    },
+    "environments": {
+        # Name -> Id index of copado__Environment__c, refreshed after ttl seconds, or on
+        # an unknown name if the index is older than refresh_on_miss_after seconds
+        "preload": True,
+        "ttl": 3600,
+        "refresh_on_miss_after": 30
+    },
+    "mirror": {
+        # Serve list tools from a local SQLite copy kept fresh by SystemModstamp delta sync
+        "enabled": False,
+        "path": "copado_mirror.db",
+        "max_staleness": 60
+    },
+    "deploy": {
+        # Deploy jobs run in the background; these bound how many run at once
+        "max_workers": 4,
+        "max_parallel": 4,
+        # Seconds between promotion status polls, and before a deployment is given up on
+        "poll_interval": 5,
+        "timeout": 1800,
+        # Mock mode pauses this long in each simulated deployment phase
+        "mock_step_seconds": 0.5,
+        # Finished jobs stay queryable for this many seconds
+        "retention": 3600
+    },
+    "bulk": {
+        # Seconds between job status polls, and before an unfinished job is aborted
+        "poll_interval": 2,
+        "timeout": 900,
+        # Rows per CSV result page
+        "max_records": 100000,
+        # Directory export tools write files into; their path argument is relative to it
+        "export_dir": "exports"
+    },
+    "mock_data": {
+        # Data behind mock mode and the fallback. A non-zero stories/promotions count
+        # generates a deterministic synthetic dataset instead of the built-in sample;
+        # an existing snapshot file is loaded instead of either and rewritten on exit.
+        "stories": 0,
+        "promotions": 0,
+        "environments": 4,
+        "projects": 10,
+        "seed": 42,
+        "snapshot": None
+    },
+    "http_server": {
+        # Streamable HTTP transport (python -m copado_mcp.http_transport). Every session
+        # shares the worker's client, connection pool and read cache.
+        "host": "127.0.0.1",
+        "port": 8080,
+        "path": "/mcp",
+        # Pre-forked processes accepting on one socket; each has its own client and jobs
+        "workers": 1,
+        # Open connections per worker; beyond this new clients wait in the listen backlog
+        "max_connections": 64,
+        # Requests processed at once per worker, and seconds one may wait for a slot
+        # before being refused with 503
+        "max_inflight": 32,
+        "queue_timeout": 5,
+        "max_body_bytes": 1048576,
+        # Idle seconds before a keep-alive connection is closed, and between SSE pings
+        # while a streamed call is still running
+        "keepalive_timeout": 30,
+        "sse_ping_interval": 15,
+        # Browser origins allowed besides localhost (DNS rebinding protection)
+        "allowed_origins": []
+    },
+    "circuit_breaker": {
+        # After failure_threshold consecutive failed calls of one kind (query, create,
+        # update, bulk: errors, 5xx and 429 left after retries) further calls fail at once
+        # and list tools answer from the last good cached page or the mock data. A health
+        # probe every probe_interval seconds, or reset_timeout seconds passing, lets one
+        # trial call through to close the circuit again.
+        "enabled": True,
+        "failure_threshold": 3,
+        "reset_timeout": 30,
+        "probe_interval": 5
+    },
+    "metrics": {
+        # Seconds between JSON stats dumps to stderr; 0 disables them
+        "dump_interval": 0
+    },
+    "http": {
+        # Connection pool shared by all Salesforce calls of one client
+        "pool_connections": 4,
+        "pool_maxsize": 16,
+        # Retries on 429/503 and connection errors, with exponential backoff plus jitter
+        "max_retries": 3,
+        "backoff_factor": 0.5,
+        "backoff_jitter": 0.5,
+        # Seconds; "connect" applies to every call, the others are read timeouts per operation
+        "timeouts": {
+            "connect": 5,
+            "query": 30,
+            "create": 30,
+            "update": 30,
+            "bulk": 120
+        }
+    }
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = path or os.environ.get("COPADO_MCP_CONFIG")
+    if path:
+        with open(path) as f:
+            _merge(config, json.load(f))
+    return config
@@ -0,0 +1,703 @@
+import io
+import re
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+from .mock_data import generate_dataset
+
+# Local stand-in for the Salesforce REST API, covering exactly what CopadoClient uses:
+# /query and /queryAll with nextRecordsUrl paging and COUNT ... GROUP BY aggregates,
+# /sobjects create/retrieve/update, /composite/graph and /composite/sobjects, and
+# Bulk API 2.0 query jobs with CSV results, for the Copado objects. Records are stored flat, keyed by SOQL field path
+# ("copado__Project__r.Name"), and nested on output.
+
+API_PATH = "/services/data/v60.0"
+
+# Three-character key prefix per object, as in real Salesforce Ids
+KEY_PREFIXES = {
+    "copado__Environment__c": "a0E",
+    "copado__User_Story__c": "a0U",
+    "copado__Promotion__c": "a0P",
+    "copado__Promoted_User_Story__c": "a0S",
+    "copado__Project__c": "a0J"
+}
+
+# Child relationship name -> (child object, lookup field pointing at the parent)
+CHILD_RELATIONSHIPS = {
+    "copado__Promoted_User_Stories__r": ("copado__Promoted_User_Story__c", "copado__Promotion__c")
+}
+
+_TOKEN = re.compile(r"'(?:\\.|[^'\\])*'|\(|\)|,|>=|<=|!=|=|>|<|[^\s,()=<>!]+")
+_UNESCAPE = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f"}
+
+
+def _sf_datetime(iso: str) -> str:
+    # 2023-01-01T00:07:00Z -> 2023-01-01T00:07:00.000+0000, the API's wire format
+    return iso.replace("Z", "")[:19] + ".000+0000"
+
+
+def _literal(token: str) -> Any:
+    if token.startswith("'"):
+        return re.sub(r"\\(.)", lambda m: _UNESCAPE.get(m.group(1), m.group(1)), token[1:-1])
+    lowered = token.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered == "null":
+        return None
+    if re.match(r"^\d{4}-\d{2}-\d{2}T", token):
+        return _sf_datetime(token)
+    try:
+        return int(token)
+    except ValueError:
+        return token
+
+
+def parse_soql(soql: str) -> Dict[str, Any]:
+    """Parses the SOQL subset CopadoClient emits.
+
+    SELECT <fields> FROM <object> [WHERE <field> <op> <value> [AND ...]]
+    [GROUP BY <field>, ...] [ORDER BY <field> [ASC|DESC], ...] [LIMIT <n>], where
+    op is one of = != > < >= <= IN. Selected fields may carry an alias,
+    COUNT(<field>) [alias] makes the query an aggregate one, and
+    (SELECT <fields> FROM <child relationship> [WHERE ...]) adds a subquery.
+    """
+    tokens = _TOKEN.findall(soql)
+    pos = 0
+
+    def peek(offset: int = 0) -> Optional[str]:
+        return tokens[pos + offset] if pos + offset < len(tokens) else None
+
+    def take() -> str:
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def keyword(word: str) -> bool:
+        return (peek() or "").upper() == word
+
+    def expect(word: str):
+        if not keyword(word):
+            raise ValueError(f"Expected {word} at '{peek()}' in: {soql}")
+        take()
+
+    def alias() -> Optional[str]:
+        return take() if peek() not in (",", None) and not keyword("FROM") else None
+
+    expect("SELECT")
+    fields: List[str] = []
+    aliases: Dict[str, str] = {}
+    aggregates: List[Tuple[str, str, str]] = []
+    subqueries: List[Dict[str, Any]] = []
+    while not keyword("FROM"):
+        token = take()
+        if token == ",":
+            continue
+        if token == "(" and keyword("SELECT"):
+            depth, inner = 1, []
+            while True:
+                token = take()
+                depth += {"(": 1, ")": -1}.get(token, 0)
+                if depth == 0:
+                    break
+                inner.append(token)
+            subqueries.append(parse_soql(" ".join(inner)))
+        elif peek() == "(":
+            take()
+            field = take()
+            expect(")")
+            # Unaliased aggregates are named expr0, expr1, ... as in Salesforce
+            aggregates.append((token.upper(), field, alias() or f"expr{len(aggregates)}"))
+        else:
+            fields.append(token)
+            name = alias()
+            if name:
+                aliases[token] = name
+    expect("FROM")
+    query: Dict[str, Any] = {
+        "fields": fields, "aliases": aliases, "aggregates": aggregates, "subqueries": subqueries, "object": take(),
+        "where": [], "group_by": [], "order_by": [], "limit": None
+    }
+
+    if keyword("WHERE"):
+        take()
+        while True:
+            field, op = take(), take().upper()
+            if op == "IN":
+                expect("(")
+                values = []
+                while peek() != ")":
+                    token = take()
+                    if token != ",":
+                        values.append(_literal(token))
+                take()
+                query["where"].append((field, "IN", values))
+            else:
+                query["where"].append((field, op, _literal(take())))
+            if not keyword("AND"):
+                break
+            take()
+
+    if keyword("GROUP"):
+        take()
+        expect("BY")
+        while True:
+            query["group_by"].append(take())
+            if peek() != ",":
+                break
+            take()
+
+    if keyword("ORDER"):
+        take()
+        expect("BY")
+        while True:
+            field = take()
+            direction = "ASC"
+            if keyword("ASC") or keyword("DESC"):
+                direction = take().upper()
+            query["order_by"].append((field, direction))
+            if peek() != ",":
+                break
+            take()
+
+    if keyword("LIMIT"):
+        take()
+        query["limit"] = int(take())
+
+    if peek() is not None:
+        raise ValueError(f"Unsupported SOQL near '{peek()}': {soql}")
+    return query
+
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    if op == "IN":
+        return value is not None and str(value).lower() in {str(e).lower() for e in expected}
+    if op == "=":
+        return (value is None and expected is None) or (value is not None and expected is not None and str(value).lower() == str(expected).lower())
+    if op == "!=":
+        return not _matches(value, "=", expected)
+    if value is None or expected is None:
+        return False
+    return {">": value > expected, "<": value < expected, ">=": value >= expected, "<=": value <= expected}[op]
+
+
+def _aggregate(rows: List[Dict[str, Any]], parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # One flat AggregateResult row per group, keyed by alias (or field path)
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        # Grouping is case-insensitive, as in SOQL
+        key = tuple(str(row.get(field)).lower() for field in parsed["group_by"])
+        groups.setdefault(key, []).append(row)
+    results = []
+    for members in groups.values():
+        result = {parsed["aliases"].get(field, field): members[0].get(field) for field in parsed["fields"]}
+        for function, field, name in parsed["aggregates"]:
+            if function != "COUNT":
+                raise SalesforceError(400, "MALFORMED_QUERY", f"Unsupported aggregate function {function}")
+            result[name] = sum(1 for r in members if r.get(field) is not None)
+        results.append(result)
+    return results
+
+
+def _nest(record: Dict[str, Any], fields: List[str], sobject: str) -> Dict[str, Any]:
+    if sobject == "AggregateResult":
+        return {"attributes": {"type": sobject}, **{field: record.get(field) for field in fields}}
+    out: Dict[str, Any] = {"attributes": {"type": sobject, "url": f"{API_PATH}/sobjects/{sobject}/{record['Id']}"}}
+    for path in fields:
+        parts = path.split(".")
+        if len(parts) == 1:
+            out[path] = record.get(path)
+            continue
+        value = record.get(path)
+        if value is None:
+            out.setdefault(parts[0], None)
+            continue
+        parent = out.get(parts[0]) or {}
+        parent[parts[1]] = value
+        out[parts[0]] = parent
+    return out
+
+
+class RawResponse(NamedTuple):
+    # A non-JSON body, such as a Bulk API CSV result page
+    data: bytes
+    content_type: str
+    headers: Dict[str, str]
+
+
+class SalesforceError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class FakeSalesforce:
+    def __init__(
+        self,
+        stories: int = 1000,
+        promotions: int = 100,
+        environments: int = 4,
+        seed: int = 42,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        batch_size: int = 2000,
+        deploy_seconds: float = 1.0,
+        bulk_seconds: float = 0.1,
+        daily_api_limit: int = 15000
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.batch_size = batch_size
+        self.deploy_seconds = deploy_seconds
+        self.bulk_seconds = bulk_seconds
+        self.daily_api_limit = daily_api_limit
+        self.api_calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = {prefix: itertools.count(1) for prefix in KEY_PREFIXES.values()}
+        self._records: Dict[str, List[Dict[str, Any]]] = {sobject: [] for sobject in KEY_PREFIXES}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        # Query locator -> matching records, for nextRecordsUrl paging
+        self._cursors: "OrderedDict[str, Tuple[List[Dict[str, Any]], List[str], str]]" = OrderedDict()
+        self._scheduled: Dict[str, float] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._load(generate_dataset(stories, promotions, environments, seed=seed))
+
+    # --- data -------------------------------------------------------------
+
+    def _new_id(self, sobject: str) -> str:
+        prefix = KEY_PREFIXES[sobject]
+        return f"{prefix}{next(self._ids[prefix]):015d}"
+
+    def _insert(self, sobject: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        record = {"Id": self._new_id(sobject), "IsDeleted": False, "CreatedDate": now, "SystemModstamp": now}
+        record.update(fields)
+        self._records[sobject].append(record)
+        self._by_id[record["Id"]] = record
+        for key in [k for k in self._indexes if k[0] == sobject]:
+            del self._indexes[key]
+        return record
+
+    def _load(self, data: Dict[str, List[Any]]):
+        env_ids = {}
+        for name in data["ENVIRONMENTS"]:
+            env_ids[name] = self._insert("copado__Environment__c", {"Name": name})["Id"]
+        story_ids = {}
+        for story in data["USER_STORIES"]:
+            story_ids[story["id"]] = self._insert("copado__User_Story__c", {
+                "Name": story["name"],
+                "copado__User_Story_Title__c": story["title"],
+                "copado__Status__c": story["status"],
+                "copado__Priority__c": story["priority"],
+                "copado__Project__r.Name": story["project"],
+                "CreatedDate": _sf_datetime(story["created_at"]),
+                "SystemModstamp": _sf_datetime(story["created_at"])
+            })["Id"]
+        for promotion in data["PROMOTIONS"]:
+            promo = self._insert("copado__Promotion__c", {
+                "Name": promotion["name"],
+                "copado__Status__c": promotion["status"],
+                "copado__Source_Environment__c": env_ids[promotion["source_env"]],
+                "copado__Source_Environment__r.Name": promotion["source_env"],
+                "copado__Destination_Environment__c": env_ids[promotion["target_env"]],
+                "copado__Destination_Environment__r.Name": promotion["target_env"],
+                "CreatedDate": _sf_datetime(promotion["created_at"]),
+                "SystemModstamp": _sf_datetime(promotion["created_at"])
+            })
+            for story_id in promotion["user_stories"]:
+                self._insert_promoted_story(promo["Id"], story_ids[story_id])
+
+    def _insert_promoted_story(self, promotion_id: str, story_id: str) -> Dict[str, Any]:
+        story = self._by_id.get(story_id)
+        if story is None or not story_id.startswith(KEY_PREFIXES["copado__User_Story__c"]):
+            raise SalesforceError(400, "INVALID_CROSS_REFERENCE_KEY", f"invalid cross reference id: {story_id}")
+        return self._insert("copado__Promoted_User_Story__c", {
+            "Name": f"PUS-{story['Name']}",
+            "copado__Promotion__c": promotion_id,
+            "copado__User_Story__c": story_id,
+            "copado__User_Story__r.Name": story["Name"],
+            "copado__User_Story__r.copado__User_Story_Title__c": story.get("copado__User_Story_Title__c")
+        })
+
+    def _index(self, sobject: str, field: str) -> Dict[str, List[Dict[str, Any]]]:
+        key = (sobject, field)
+        if key not in self._indexes:
+            index: Dict[str, List[Dict[str, Any]]] = {}
+            for record in self._records[sobject]:
+                index.setdefault(str(record.get(field)).lower(), []).append(record)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    # --- REST operations ----------------------------------------------------
+
+    def query(self, soql: str) -> Dict[str, Any]:
+        rows, fields, sobject = self._select(soql)
+        return self._page(rows, fields, sobject, None, 0)
+
+    def _select(self, soql: str) -> Tuple[List[Dict[str, Any]], List[str], str]:
+        try:
+            parsed = parse_soql(soql)
+        except (ValueError, IndexError) as e:
+            raise SalesforceError(400, "MALFORMED_QUERY", str(e))
+        sobject = parsed["object"]
+        if sobject not in self._records:
+            raise SalesforceError(400, "INVALID_TYPE", f"sObject type '{sobject}' is not supported.")
+
+        with self._lock:
+            candidates = self._records[sobject]
+            conditions = list(parsed["where"])
+            # Answer one equality filter from a hash index, like a selective SOQL filter
+            for i, (field, op, value) in enumerate(conditions):
+                if op in ("=", "IN") and value is not None:
+                    index = self._index(sobject, field)
+                    values = value if op == "IN" else [value]
+                    candidates = [r for v in values for r in index.get(str(v).lower(), [])]
+                    del conditions[i]
+                    break
+            rows = [r for r in candidates if all(_matches(r.get(f), op, v) for f, op, v in conditions)]
+
+            fields = parsed["fields"]
+            for subquery in parsed["subqueries"]:
+                # Each parent row gets the relationship's result set, nested like a query result
+                relationship = subquery["object"]
+                if relationship not in CHILD_RELATIONSHIPS:
+                    raise SalesforceError(400, "INVALID_TYPE", f"Didn't understand relationship '{relationship}' in FROM part of query call.")
+                child_object, lookup = CHILD_RELATIONSHIPS[relationship]
+                index = self._index(child_object, lookup)
+                rows = [dict(r, **{relationship: self._children(index.get(r["Id"].lower(), []), subquery, child_object)}) for r in rows]
+                fields = fields + [relationship]
+
+        if parsed["aggregates"] or parsed["group_by"]:
+            rows = _aggregate(rows, parsed)
+            fields = [parsed["aliases"].get(f, f) for f in fields] + [name for _, _, name in parsed["aggregates"]]
+            sobject = "AggregateResult"
+        for field, direction in reversed(parsed["order_by"]):
+            field = parsed["aliases"].get(field, field) if sobject == "AggregateResult" else field
+            rows.sort(key=lambda r: (r.get(field) is not None, r.get(field) or ""), reverse=direction == "DESC")
+        if parsed["limit"] is not None:
+            rows = rows[:parsed["limit"]]
+        return rows, fields, sobject
+
+    @staticmethod
+    def _children(children: List[Dict[str, Any]], subquery: Dict[str, Any], child_object: str) -> Optional[Dict[str, Any]]:
+        # An empty subquery result is null in the parent record, as in Salesforce
+        children = [c for c in children if all(_matches(c.get(f), op, v) for f, op, v in subquery["where"])]
+        if not children:
+            return None
+        return {"totalSize": len(children), "done": True, "records": [_nest(c, subquery["fields"], child_object) for c in children]}
+
+    def query_more(self, locator: str, offset: int) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._cursors.get(locator)
+        if entry is None:
+            raise SalesforceError(400, "INVALID_QUERY_LOCATOR", "invalid query locator")
+        rows, fields, sobject = entry
+        return self._page(rows, fields, sobject, locator, offset)
+
+    def _page(self, rows: List[Dict[str, Any]], fields: List[str], sobject: str, locator: Optional[str], offset: int) -> Dict[str, Any]:
+        end = offset + self.batch_size
+        body: Dict[str, Any] = {
+            "totalSize": len(rows),
+            "done": end >= len(rows),
+            "records": [_nest(r, fields, sobject) for r in rows[offset:end]]
+        }
+        if end < len(rows):
+            if locator is None:
+                locator = f"01g{next(self._ids[KEY_PREFIXES['copado__Project__c']]):015d}"
+                with self._lock:
+                    self._cursors[locator] = (rows, fields, sobject)
+                    while len(self._cursors) > 100:
+                        self._cursors.popitem(last=False)
+            body["nextRecordsUrl"] = f"{API_PATH}/query/{locator}-{end}"
+        return body
+
+    def create_query_job(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        # Bulk API 2.0: the query runs at once, but the job reports InProgress for
+        # bulk_seconds so clients exercise their polling
+        rows, fields, sobject = self._select(body["query"])
+        if sobject == "AggregateResult" or any(field in CHILD_RELATIONSHIPS for field in fields):
+            raise SalesforceError(400, "API_ERROR", "Aggregate queries and subqueries are not supported by Bulk API 2.0")
+        with self._lock:
+            job_id = f"750{next(self._ids[KEY_PREFIXES['copado__Project__c']]):015d}"
+            self._jobs[job_id] = {"rows": rows, "fields": fields, "ready_at": time.monotonic() + self.bulk_seconds, "state": None}
+            while len(self._jobs) > 100:
+                del self._jobs[next(iter(self._jobs))]
+        return self.query_job(job_id)
+
+    def query_job(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise SalesforceError(404, "NOT_FOUND", f"Job {job_id} not found")
+        state = job["state"] or ("JobComplete" if time.monotonic() >= job["ready_at"] else "InProgress")
+        return {"id": job_id, "operation": "query", "state": state, "numberRecordsProcessed": len(job["rows"]) if state == "JobComplete" else 0}
+
+    def abort_query_job(self, job_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and body.get("state") == "Aborted":
+                job["state"] = "Aborted"
+        return self.query_job(job_id)
+
+    def query_job_results(self, job_id: str, locator: Optional[str], max_records: Optional[int]) -> "RawResponse":
+        if self.query_job(job_id)["state"] != "JobComplete":
+            raise SalesforceError(400, "INVALIDJOBSTATE", f"Job {job_id} is not complete")
+        rows, fields = self._jobs[job_id]["rows"], self._jobs[job_id]["fields"]
+        start = int(locator or 0)
+        end = start + (max_records or 50000)
+        out = io.StringIO()
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        writer.writerow(fields)
+        for record in rows[start:end]:
+            writer.writerow(["" if record.get(f) is None else record.get(f) for f in fields])
+        headers = {
+            "Sforce-Locator": str(end) if end < len(rows) else "null",
+            "Sforce-NumberOfRecords": str(len(rows[start:end]))
+        }
+        return RawResponse(out.getvalue().encode(), "text/csv", headers)
+
+    def create(self, sobject: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        if sobject not in self._records:
+            raise SalesforceError(404, "NOT_FOUND", f"The requested resource does not exist: {sobject}")
+        with self._lock:
+            if sobject == "copado__Promoted_User_Story__c":
+                record = self._insert_promoted_story(fields.get("copado__Promotion__c"), fields.get("copado__User_Story__c"))
+            else:
+                record = self._insert(sobject, self._with_relationships(fields))
+        return {"id": record["Id"], "success": True, "errors": []}
+
+    def _with_relationships(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        # Denormalize lookups so relationship paths can be selected later
+        fields = dict(fields)
+        for lookup in ("copado__Source_Environment__c", "copado__Destination_Environment__c"):
+            if lookup in fields:
+                env = self._by_id.get(fields[lookup])
+                if env is None:
+                    raise SalesforceError(400, "INVALID_CROSS_REFERENCE_KEY", f"invalid cross reference id: {fields[lookup]}")
+                fields[lookup[:-1] + "r.Name"] = env["Name"]
+        return fields
+
+    def retrieve(self, sobject: str, record_id: str, fields: Optional[List[str]]) -> Dict[str, Any]:
+        with self._lock:
+            record = self._by_id.get(record_id)
+            if record is None:
+                raise SalesforceError(404, "NOT_FOUND", "The requested resource does not exist")
+            # A scheduled promotion completes deploy_seconds after it was scheduled
+            started = self._scheduled.get(record_id)
+            if started is not None and time.monotonic() - started >= self.deploy_seconds:
+                record["copado__Status__c"] = "Completed"
+                del self._scheduled[record_id]
+        return _nest(record, fields or [k for k in record if "." not in k], sobject)
+
+    def update(self, sobject: str, record_id: str, fields: Dict[str, Any]):
+        with self._lock:
+            record = self._by_id.get(record_id)
+            if record is None:
+                raise SalesforceError(404, "NOT_FOUND", "The requested resource does not exist")
+            record.update(fields)
+            record["SystemModstamp"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+            if fields.get("copado__Status__c") == "Scheduled":
+                self._scheduled[record_id] = time.monotonic()
+            for key in [k for k in self._indexes if k[0] == sobject]:
+                del self._indexes[key]
+
+    def composite_graph(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        graphs = []
+        for graph in body.get("graphs", []):
+            refs: Dict[str, str] = {}
+            responses = []
+            failed = False
+            for node in graph["compositeRequest"]:
+                if failed:
+                    responses.append({"referenceId": node["referenceId"], "httpStatusCode": 400, "body": [{"errorCode": "PROCESSING_HALTED", "message": "The transaction was rolled back since another operation in the same transaction failed."}]})
+                    continue
+                fields = {
+                    k: re.sub(r"@\{(\w+)\.id\}", lambda m: refs.get(m.group(1), ""), v) if isinstance(v, str) else v
+                    for k, v in node.get("body", {}).items()
+                }
+                try:
+                    result = self.create(node["url"].rstrip("/").split("/")[-1], fields)
+                    refs[node["referenceId"]] = result["id"]
+                    responses.append({"referenceId": node["referenceId"], "httpStatusCode": 201, "body": result})
+                except SalesforceError as e:
+                    failed = True
+                    responses.append({"referenceId": node["referenceId"], "httpStatusCode": e.status, "body": [{"errorCode": e.code, "message": str(e)}]})
+            if failed:
+                # A graph is one transaction: undo whatever this graph inserted
+                self._rollback(refs.values())
+                for response in responses:
+                    if response["httpStatusCode"] == 201:
+                        response.update(httpStatusCode=400, body=[{"errorCode": "PROCESSING_HALTED", "message": "The transaction was rolled back since another operation in the same transaction failed."}])
+            graphs.append({"graphId": graph["graphId"], "isSuccessful": not failed, "graphResponse": {"compositeResponse": responses}})
+        return {"graphs": graphs}
+
+    def composite_sobjects(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # With allOrNone the request is one transaction: the first failure rolls back the
+        # records created before it, and every record of the request is reported as failed.
+        all_or_none = body.get("allOrNone", False)
+        rolled_back = {"id": None, "success": False, "errors": [{"statusCode": "ALL_OR_NONE_OPERATION_ROLLED_BACK", "message": "Record rolled back because not all records were valid and the request was using AllOrNone header", "fields": []}]}
+        results = []
+        failed = False
+        for record in body.get("records", []):
+            if failed:
+                results.append(rolled_back)
+                continue
+            fields = {k: v for k, v in record.items() if k != "attributes"}
+            try:
+                results.append(self.create(record["attributes"]["type"], fields))
+            except SalesforceError as e:
+                results.append({"id": None, "success": False, "errors": [{"statusCode": e.code, "message": str(e), "fields": []}]})
+                failed = all_or_none
+        if failed:
+            self._rollback([result["id"] for result in results if result["success"]])
+            results = [result if not result["success"] else rolled_back for result in results]
+        return results
+
+    def _rollback(self, record_ids: Iterable[str]):
+        with self._lock:
+            for record_id in record_ids:
+                record = self._by_id.pop(record_id)
+                self._records[[s for s, p in KEY_PREFIXES.items() if record_id.startswith(p)][0]].remove(record)
+            self._indexes.clear()
+
+    # --- HTTP -------------------------------------------------------------
+
+    def handle(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        url = urlparse(path)
+        route = url.path[len(API_PATH):] if url.path.startswith(API_PATH) else url.path
+        params = parse_qs(url.query)
+
+        if method == "GET" and route in ("/query", "/queryAll"):
+            return 200, self.query(params.get("q", [""])[0])
+        match = re.match(r"^/query/([^/]+)-(\d+)$", route)
+        if method == "GET" and match:
+            return 200, self.query_more(match.group(1), int(match.group(2)))
+        if method == "POST" and route == "/jobs/query":
+            return 200, self.create_query_job(body)
+        match = re.match(r"^/jobs/query/([^/]+)/results$", route)
+        if method == "GET" and match:
+            max_records = params.get("maxRecords", [None])[0]
+            return 200, self.query_job_results(match.group(1), params.get("locator", [None])[0], int(max_records) if max_records else None)
+        match = re.match(r"^/jobs/query/([^/]+)$", route)
+        if match and method == "GET":
+            return 200, self.query_job(match.group(1))
+        if match and method == "PATCH":
+            return 200, self.abort_query_job(match.group(1), body)
+        if method == "POST" and route == "/composite/graph":
+            return 200, self.composite_graph(body)
+        if method == "POST" and route == "/composite/sobjects":
+            return 200, self.composite_sobjects(body)
+        match = re.match(r"^/sobjects/(\w+)$", route)
+        if method == "POST" and match:
+            return 201, self.create(match.group(1), body)
+        match = re.match(r"^/sobjects/(\w+)/([^/]+)$", route)
+        if match and method == "GET":
+            fields = params.get("fields", [""])[0]
+            return 200, self.retrieve(match.group(1), unquote(match.group(2)), [f.strip() for f in fields.split(",") if f.strip()] or None)
+        if match and method == "PATCH":
+            self.update(match.group(1), unquote(match.group(2)), body)
+            return 204, None
+        raise SalesforceError(404, "NOT_FOUND", f"The requested resource does not exist: {route}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY, Nagle plus the
+    # client's delayed ACK adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    fake: FakeSalesforce
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def _dispatch(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        fake = self.fake
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        with fake._lock:
+            fake.api_calls += 1
+            api_calls = fake.api_calls
+        try:
+            if fake.error_rate and fake._rng.random() < fake.error_rate:
+                raise SalesforceError(503, "SERVER_UNAVAILABLE", "Injected failure")
+            status, payload = fake.handle(method, self.path, json.loads(raw) if raw else None)
+        except SalesforceError as e:
+            status, payload = e.status, [{"errorCode": e.code, "message": str(e)}]
+
+        if isinstance(payload, RawResponse):
+            data, content_type, extra = payload.data, payload.content_type, payload.headers
+        else:
+            data = b"" if payload is None else json.dumps(payload).encode()
+            content_type, extra = "application/json;charset=UTF-8", {}
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.send_header("Sforce-Limit-Info", f"api-usage={api_calls}/{fake.daily_api_limit}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+
+def serve(fake: FakeSalesforce, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Starts the fake on a background thread; the bound URL is server.url."""
+    handler = type("FakeSalesforceHandler", (_Handler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-salesforce", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Salesforce REST stand-in for the Copado objects")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stories", type=int, default=1000)
+    parser.add_argument("--promotions", type=int, default=100)
+    parser.add_argument("--environments", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Records per /query batch")
+    args = parser.parse_args()
+
+    fake = FakeSalesforce(
+        stories=args.stories, promotions=args.promotions, environments=args.environments, seed=args.seed,
+        latency=args.latency, error_rate=args.error_rate, batch_size=args.batch_size
+    )
+    server = serve(fake, args.host, args.port)
+    print(f"Fake Salesforce listening on {server.url} (SALESFORCE_INSTANCE_URL={server.url})", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import os
+import hmac
+import json
+import uuid
+import signal
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .config import load_config
+from .server import MCPServer, STATIC_ENCODED, static_response, _encode
+
+# Streamable HTTP transport (MCP 2025-03-26) for MCPServer: one endpoint taking JSON-RPC
+# messages by POST and answering with JSON or, for calls that want progress, with an SSE
+# stream. Sessions of any number of clients share one MCPServer, so they share its
+# pooled Salesforce client and read cache.
+#
+#   python -m copado_mcp.http_transport --port 8080 --workers 4
+
+logger = logging.getLogger(__name__)
+
+SESSION_HEADER = "Mcp-Session-Id"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def _discard(message: Dict[str, Any]):
+    pass
+
+
+def _is_request(message: Dict[str, Any]) -> bool:
+    return "method" in message and "id" in message
+
+
+def _wants_progress(message: Dict[str, Any]) -> bool:
+    params = message.get("params")
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    return isinstance(meta, dict) and meta.get("progressToken") is not None
+
+
+class SessionSigner:
+    """Session ids are signed rather than stored, so every worker process accepts the
+    ids any other worker issued. A DELETE is only remembered by the worker that got it."""
+
+    def __init__(self, secret: bytes, max_revoked: int = 10000):
+        self._secret = secret
+        self._revoked: Dict[str, None] = {}
+        self._max_revoked = max_revoked
+        self._lock = threading.Lock()
+
+    def _sign(self, token: str) -> str:
+        return hmac.new(self._secret, token.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def issue(self) -> str:
+        token = uuid.uuid4().hex
+        return f"{token}.{self._sign(token)}"
+
+    def valid(self, session_id: str) -> bool:
+        token, _, signature = session_id.partition(".")
+        if not hmac.compare_digest(signature, self._sign(token)):
+            return False
+        with self._lock:
+            return session_id not in self._revoked
+
+    def revoke(self, session_id: str):
+        with self._lock:
+            self._revoked[session_id] = None
+            while len(self._revoked) > self._max_revoked:
+                del self._revoked[next(iter(self._revoked))]
+
+
+class _EventStream:
+    # Chunked text/event-stream body. Progress from job threads and the ping timer write
+    # concurrently with the handler thread, and may outlive the stream.
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._lock = threading.Lock()
+        self.closed = False
+        self.broken = False
+
+    def _chunk(self, data: bytes, last: bool = False):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                if data:
+                    self._wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                if last:
+                    self._wfile.write(b"0\r\n\r\n")
+                self._wfile.flush()
+            except OSError:
+                # The client went away; the call still finishes, its output is dropped
+                self.broken = last = True
+            self.closed = last
+
+    def send(self, message: Dict[str, Any]):
+        self.send_encoded(_encode(message))
+
+    def send_encoded(self, data: bytes):
+        self._chunk(b"event: message\ndata: " + data + b"\n\n")
+
+    def ping(self):
+        self._chunk(b": ping\n\n")
+
+    def close(self):
+        self._chunk(b"", last=True)
+
+
+class HTTPTransport:
+    def __init__(self, mcp: MCPServer, settings: Dict[str, Any], sessions: SessionSigner):
+        self.mcp = mcp
+        self.settings = settings
+        self.sessions = sessions
+        self._slots = threading.BoundedSemaphore(settings["max_inflight"])
+
+    def admit(self) -> bool:
+        return self._slots.acquire(timeout=self.settings["queue_timeout"])
+
+    def release(self):
+        self._slots.release()
+
+    def respond(self, message: Dict[str, Any], notify) -> Optional[bytes]:
+        # Notifications are handled without an answer; client responses are ignored
+        if not _is_request(message):
+            if "method" in message:
+                self.mcp.handle_request(message, notify=_discard)
+            return None
+        if message.get("method") in STATIC_ENCODED:
+            return static_response(message["id"], message["method"])
+        response = self.mcp.handle_request(message, notify=notify)
+        if response is None:
+            response = {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": "Method not found"}}
+        return _encode(response)
+
+    def respond_all(self, messages: List[Dict[str, Any]], batch: bool, notify) -> List[bytes]:
+        # A batch runs its calls concurrently on the server's tool pool, as over stdio
+        if not batch:
+            response = self.respond(messages[0], notify)
+            return [response] if response is not None else []
+        return [_encode(response) for response in self.mcp.handle_request(messages, notify=notify) or []]
+
+
+class _BoundedHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    transport: HTTPTransport
+
+    def __init__(self, address, handler, max_connections: int):
+        self._connections = threading.BoundedSemaphore(max_connections)
+        super().__init__(address, handler)
+
+    def process_request(self, request, client_address):
+        # Accepting stops while max_connections are open; new clients queue in the backlog
+        self._connections.acquire()
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connections.release()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: _BoundedHTTPServer
+
+    def setup(self):
+        # Idle keep-alive connections are dropped after this many seconds
+        self.timeout = self.server.transport.settings["keepalive_timeout"]
+        super().setup()
+
+    def log_message(self, format: str, *args: Any):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _reply(self, status: int, body: bytes = b"", content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self._reply(status, _encode({"jsonrpc": "2.0", "id": None, "error": {"code": code, "message": message}}), headers=headers)
+
+    def _allowed(self) -> bool:
+        # Rejections leave the body unread, so such connections cannot be reused
+        settings = self.server.transport.settings
+        if urlparse(self.path).path != settings["path"]:
+            self.close_connection = True
+            self._error(404, -32601, "Not found")
+            return False
+        origin = self.headers.get("Origin")
+        if origin and urlparse(origin).hostname not in LOCAL_HOSTS and origin not in settings["allowed_origins"]:
+            self.close_connection = True
+            self._error(403, -32600, "Origin not allowed")
+            return False
+        return True
+
+    def do_GET(self):
+        # No server-initiated messages outside a request, so no standalone SSE stream
+        if self._allowed():
+            self._reply(405, headers={"Allow": "POST, DELETE"})
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        session_id = self.headers.get(SESSION_HEADER)
+        transport = self.server.transport
+        if not session_id or not transport.sessions.valid(session_id):
+            self._error(404, -32600, "Unknown session")
+            return
+        transport.sessions.revoke(session_id)
+        self._reply(204)
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        transport = self.server.transport
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > transport.settings["max_body_bytes"]:
+            self.close_connection = True
+            self._error(413, -32600, f"Request body exceeds {transport.settings['max_body_bytes']} bytes")
+            return
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._error(400, -32700, "Parse error")
+            return
+        messages = payload if isinstance(payload, list) else [payload]
+        if not messages or not all(isinstance(m, dict) for m in messages):
+            self._error(400, -32600, "Invalid Request")
+            return
+
+        session_id = self.headers.get(SESSION_HEADER)
+        if any(m.get("method") == "initialize" for m in messages):
+            if len(messages) > 1:
+                self._error(400, -32600, "initialize must be sent on its own")
+                return
+            session_id = transport.sessions.issue()
+        elif not session_id:
+            self._error(400, -32600, f"Missing {SESSION_HEADER} header")
+            return
+        elif not transport.sessions.valid(session_id):
+            self._error(404, -32600, "Unknown session")
+            return
+        headers = {SESSION_HEADER: session_id}
+
+        if not any(_is_request(m) for m in messages):
+            # Only notifications or responses: acknowledged without a body
+            for message in messages:
+                transport.respond(message, _discard)
+            self._reply(202, headers=headers)
+            return
+
+        if not transport.admit():
+            self._error(503, -32000, "Server busy", headers={"Retry-After": "1", **headers})
+            return
+        try:
+            # Stream only when the client can take SSE and asked for progress
+            if any(_wants_progress(m) for m in messages) and "text/event-stream" in self.headers.get("Accept", ""):
+                self._stream(messages, isinstance(payload, list), headers)
+            else:
+                self._respond(messages, isinstance(payload, list), headers)
+        finally:
+            transport.release()
+
+    def _respond(self, messages: List[Dict[str, Any]], batch: bool, headers: Dict[str, str]):
+        responses = self.server.transport.respond_all(messages, batch, _discard)
+        body = b"[" + b",".join(responses) + b"]" if batch else responses[0]
+        self._reply(200, body, headers=headers)
+
+    def _stream(self, messages: List[Dict[str, Any]], batch: bool, headers: Dict[str, str]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        events = _EventStream(self.wfile)
+        done = threading.Event()
+        interval = self.server.transport.settings["sse_ping_interval"]
+
+        def keepalive():
+            # Comment lines keep proxies from timing out a long call
+            while not done.wait(interval):
+                events.ping()
+
+        threading.Thread(target=keepalive, daemon=True).start()
+        try:
+            for response in self.server.transport.respond_all(messages, batch, events.send):
+                events.send_encoded(response)
+        finally:
+            done.set()
+            events.close()
+        if events.broken:
+            self.close_connection = True
+
+
+def _run_worker(httpd: _BoundedHTTPServer, settings: Dict[str, Any], secret: bytes):
+    # Built after fork: the client's pool, cache and threads belong to one process
+    mcp = MCPServer(wait_for_jobs=settings["workers"] > 1)
+    httpd.transport = HTTPTransport(mcp, settings, SessionSigner(secret))
+    # SIGTERM (sent by the parent's stop) ends serve_forever so mcp.close() still runs;
+    # shutdown() waits for the loop, so it cannot be called from this thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown, daemon=True).start())
+    logger.info(f"Worker {os.getpid()} serving MCP on http://{settings['host']}:{httpd.server_address[1]}{settings['path']}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mcp.close()
+
+
+def serve(settings: Dict[str, Any]):
+    httpd = _BoundedHTTPServer((settings["host"], settings["port"]), _Handler, settings["max_connections"])
+    secret = os.urandom(32)
+    if settings["workers"] <= 1:
+        _run_worker(httpd, settings, secret)
+        return
+
+    children = []
+    for _ in range(settings["workers"]):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(httpd, settings, secret)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    httpd.socket.close()
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def main():
+    settings = load_config()["http_server"]
+    parser = argparse.ArgumentParser(description="Serve the Copado MCP server over Streamable HTTP")
+    parser.add_argument("--host", default=settings["host"])
+    parser.add_argument("--port", type=int, default=settings["port"])
+    parser.add_argument("--workers", type=int, default=settings["workers"], help="Pre-forked worker processes")
+    args = parser.parse_args()
+    serve(dict(settings, host=args.host, port=args.port, workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
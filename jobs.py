@@ -0,0 +1,147 @@
+import time
+import uuid
+import contextvars
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reports (percent, message) for a running job
+Progress = Callable[[int, str], None]
+
+
+class DeployJob:
+    def __init__(self, promotion_id: Optional[str] = None, children: Optional[List["DeployJob"]] = None):
+        self.id = f"J-{uuid.uuid4().hex[:8].upper()}"
+        self.promotion_id = promotion_id
+        self.children = children or []
+        self.status = "Queued"
+        self.progress = 0
+        self.message: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.utcnow().isoformat() + "Z"
+        self.finished_at: Optional[str] = None
+        self.finished_monotonic: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+        if self.promotion_id:
+            job["promotion_id"] = self.promotion_id
+            job["result"] = self.result
+        if self.children:
+            job["jobs"] = [child.to_dict() for child in self.children]
+        return job
+
+
+class JobManager:
+    """Runs deployments in the background and keeps their state for polling.
+
+    A deployment is any callable taking a Progress callback and returning the
+    client's result dict; a result with status "Error" marks the job Failed.
+    Deployments should wait on `stopping` between polls so shutdown() ends them.
+    """
+
+    def __init__(self, max_workers: int = 4, retention: float = 3600.0):
+        self.retention = retention
+        self.stopping = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deploy-job")
+        self._jobs: Dict[str, DeployJob] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[DeployJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _register(self, job: DeployJob):
+        with self._lock:
+            cutoff = time.monotonic() - self.retention
+            for job_id in [j.id for j in self._jobs.values() if j.finished_monotonic and j.finished_monotonic < cutoff]:
+                del self._jobs[job_id]
+            self._jobs[job.id] = job
+            for child in job.children:
+                self._jobs[child.id] = child
+
+    @staticmethod
+    def _finish(job: DeployJob, status: str, message: Optional[str]):
+        job.status = status
+        job.message = message
+        job.finished_at = datetime.utcnow().isoformat() + "Z"
+        job.finished_monotonic = time.monotonic()
+        job.done.set()
+
+    def _run(self, job: DeployJob, deploy: Callable[[Progress], Dict[str, Any]], on_progress: Optional[Progress]):
+        def report(percent: int, message: str):
+            job.progress = percent
+            job.message = message
+            if on_progress:
+                on_progress(percent, message)
+
+        if self.stopping.is_set():
+            # Queued behind a shutdown: never start a deployment the server cannot follow
+            self._finish(job, "Failed", "Server shutting down")
+            return
+        job.status = "Running"
+        try:
+            job.result = deploy(report)
+        except Exception as e:
+            logger.warning(f"Deploy job {job.id} failed: {e}")
+            self._finish(job, "Failed", str(e))
+            return
+        if job.result.get("status") == "Error":
+            self._finish(job, "Failed", job.result.get("message"))
+        else:
+            job.progress = 100
+            self._finish(job, "Completed", job.message)
+
+    def shutdown(self):
+        # Stops running deployments at their next poll. Queued ones still reach _run, which
+        # fails them at once, so every job's done event is set and no waiter hangs.
+        self.stopping.set()
+        self._executor.shutdown(wait=False)
+
+    def submit(self, promotion_id: str, deploy: Callable[[Progress], Dict[str, Any]], on_progress: Optional[Progress] = None) -> DeployJob:
+        job = DeployJob(promotion_id)
+        self._register(job)
+        if self.stopping.is_set():
+            self._finish(job, "Failed", "Server shutting down")
+            return job
+        # Carry the caller's context (e.g. the tool name metrics attribute calls to)
+        self._executor.submit(contextvars.copy_context().run, self._run, job, deploy, on_progress)
+        return job
+
+    def submit_batch(self, deploys: Dict[str, Callable[[Progress], Dict[str, Any]]], max_parallel: int, on_progress: Optional[Progress] = None) -> DeployJob:
+        # The batch gets its own pool so max_parallel holds per batch and batches never
+        # wait on workers held by their own children
+        children = [DeployJob(promotion_id) for promotion_id in deploys]
+        batch = DeployJob(children=children)
+        self._register(batch)
+
+        def child_progress(percent: int, message: str):
+            batch.progress = sum(child.progress for child in children) // len(children)
+            if on_progress:
+                on_progress(batch.progress, f"{sum(c.done.is_set() for c in children)}/{len(children)} promotions finished")
+
+        def run_batch():
+            batch.status = "Running"
+            with ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix="deploy-batch") as pool:
+                for child in children:
+                    pool.submit(contextvars.copy_context().run, self._run, child, deploys[child.promotion_id], child_progress)
+            failed = sum(1 for child in children if child.status == "Failed")
+            batch.progress = 100
+            status = "Completed" if not failed else "Failed" if failed == len(children) else "Partially Completed"
+            self._finish(batch, status, f"{len(children) - failed} of {len(children)} promotions deployed")
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(run_batch,), name=f"deploy-batch-{batch.id}", daemon=True).start()
+        return batch
@@ -0,0 +1,157 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+# Upper bounds (ms) of the latency histogram buckets; slower samples land in "+Inf"
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# The tool whose handler is running in this context, so upstream Salesforce calls can be
+# attributed to it. Background jobs copy the context of the call that started them.
+current_tool: ContextVar[Optional[str]] = ContextVar("current_tool", default=None)
+
+_LIMIT_INFO = re.compile(r"api-usage=(\d+)/(\d+)")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        # Upper bound of the bucket holding the q-th sample
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                **{f"le_{bound}": n for bound, n in zip(BUCKETS_MS, self.counts)},
+                "le_inf": self.counts[-1]
+            }
+        }
+
+
+class Metrics:
+    """In-process counters for tool calls, Salesforce calls, cache use and API limits."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._upstream: Dict[str, Dict[str, Any]] = {}
+        self._cache = {"hits": 0, "misses": 0}
+        self._fallbacks: Dict[str, int] = {}
+        self._stale: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+        self._api_usage: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _entry(table: Dict[str, Dict[str, Any]], name: str) -> Dict[str, Any]:
+        entry = table.get(name)
+        if entry is None:
+            entry = table[name] = {"calls": 0, "errors": 0, "latency": Histogram(), "upstream_calls": 0}
+        return entry
+
+    @contextmanager
+    def tool_call(self, name: str) -> Iterator[Dict[str, bool]]:
+        # Yields a dict the caller can set "error" on for failures reported as results
+        outcome = {"error": False}
+        token = current_tool.set(name)
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except Exception:
+            outcome["error"] = True
+            raise
+        finally:
+            current_tool.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                entry = self._entry(self._tools, name)
+                entry["calls"] += 1
+                entry["errors"] += outcome["error"]
+                entry["latency"].observe(elapsed_ms)
+
+    def record_upstream(self, operation: str, seconds: float, error: bool = False, limit_info: Optional[str] = None):
+        tool = current_tool.get()
+        with self._lock:
+            entry = self._entry(self._upstream, operation)
+            entry["calls"] += 1
+            entry["errors"] += error
+            entry["latency"].observe(seconds * 1000)
+            if tool:
+                self._entry(self._tools, tool)["upstream_calls"] += 1
+            if limit_info:
+                match = _LIMIT_INFO.search(limit_info)
+                if match:
+                    used, allotted = int(match.group(1)), int(match.group(2))
+                    self._api_usage = {"used": used, "max": allotted, "remaining": allotted - used, "updated_at": time.time()}
+
+    def record_cache(self, hit: bool):
+        with self._lock:
+            self._cache["hits" if hit else "misses"] += 1
+
+    def record_coalesced(self, operation: str):
+        # A call answered by joining an identical one already in flight
+        with self._lock:
+            self._coalesced[operation] = self._coalesced.get(operation, 0) + 1
+
+    def record_fallback(self, operation: str):
+        with self._lock:
+            self._fallbacks[operation] = self._fallbacks.get(operation, 0) + 1
+
+    def record_stale(self, operation: str):
+        # A failed call answered from the last good cached result instead
+        with self._lock:
+            self._stale[operation] = self._stale.get(operation, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            def table(entries: Dict[str, Dict[str, Any]], upstream: bool) -> Dict[str, Any]:
+                return {
+                    name: {
+                        "calls": e["calls"],
+                        "errors": e["errors"],
+                        **({} if upstream else {"upstream_calls": e["upstream_calls"]}),
+                        "latency": e["latency"].to_dict()
+                    }
+                    for name, e in entries.items()
+                }
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "tools": table(self._tools, upstream=False),
+                "salesforce": table(self._upstream, upstream=True),
+                "cache": dict(self._cache),
+                "coalesced": dict(self._coalesced),
+                "fallbacks_to_mock": dict(self._fallbacks),
+                "served_stale": dict(self._stale),
+                "api_usage": dict(self._api_usage) if self._api_usage else None
+            }
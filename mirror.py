@@ -0,0 +1,243 @@
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per mirrored object: SOQL fields to select, the local table and its columns, and how a
+# record maps to a row. SystemModstamp and IsDeleted are added to every sync query.
+OBJECTS: Dict[str, Dict[str, Any]] = {
+    "copado__Environment__c": {
+        "table": "environments",
+        "fields": "Id, Name",
+        "columns": ("id", "name"),
+        "row": lambda r: (r["Id"], r["Name"])
+    },
+    "copado__User_Story__c": {
+        "table": "user_stories",
+        "fields": "Id, Name, copado__User_Story_Title__c, copado__Status__c, copado__Priority__c, copado__Project__r.Name, CreatedDate",
+        "columns": ("id", "name", "title", "status", "priority", "project", "created_at"),
+        "row": lambda r: (
+            r["Id"], r["Name"], r.get("copado__User_Story_Title__c"), r.get("copado__Status__c"),
+            r.get("copado__Priority__c"), (r.get("copado__Project__r") or {}).get("Name"), r.get("CreatedDate")
+        )
+    },
+    "copado__Promotion__c": {
+        "table": "promotions",
+        "fields": "Id, Name, copado__Status__c, copado__Source_Environment__r.Name, copado__Destination_Environment__r.Name, CreatedDate",
+        "columns": ("id", "name", "status", "source_env", "target_env", "created_at"),
+        "row": lambda r: (
+            r["Id"], r["Name"], r.get("copado__Status__c"),
+            (r.get("copado__Source_Environment__r") or {}).get("Name"),
+            (r.get("copado__Destination_Environment__r") or {}).get("Name"),
+            r.get("CreatedDate")
+        )
+    },
+    "copado__Promoted_User_Story__c": {
+        "table": "promoted_user_stories",
+        "fields": "Id, copado__Promotion__c, copado__User_Story__c",
+        "columns": ("id", "promotion_id", "user_story_id"),
+        "row": lambda r: (r["Id"], r.get("copado__Promotion__c"), r.get("copado__User_Story__c"))
+    }
+}
+
+# Bumped whenever the tables change; a mirror file with another version is rebuilt
+# from scratch, since it only ever holds a copy of org data.
+SCHEMA_VERSION = 2
+
+# Filterable text columns compare case-insensitively, like SOQL string comparisons
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS environments (id TEXT PRIMARY KEY, name TEXT COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS user_stories (
+    id TEXT PRIMARY KEY, name TEXT COLLATE NOCASE, title TEXT, status TEXT COLLATE NOCASE,
+    priority TEXT COLLATE NOCASE, project TEXT COLLATE NOCASE, created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS promotions (
+    id TEXT PRIMARY KEY, name TEXT COLLATE NOCASE, status TEXT COLLATE NOCASE,
+    source_env TEXT COLLATE NOCASE, target_env TEXT COLLATE NOCASE, created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS promoted_user_stories (id TEXT PRIMARY KEY, promotion_id TEXT, user_story_id TEXT);
+CREATE TABLE IF NOT EXISTS sync_state (object TEXT PRIMARY KEY, last_modstamp TEXT, synced_at REAL);
+CREATE INDEX IF NOT EXISTS idx_environments_name ON environments (name);
+CREATE INDEX IF NOT EXISTS idx_user_stories_status ON user_stories (status, id);
+CREATE INDEX IF NOT EXISTS idx_user_stories_project ON user_stories (project, id);
+CREATE INDEX IF NOT EXISTS idx_user_stories_priority ON user_stories (priority, id);
+CREATE INDEX IF NOT EXISTS idx_promotions_status ON promotions (status, id);
+CREATE INDEX IF NOT EXISTS idx_promotions_envs ON promotions (source_env, target_env);
+CREATE INDEX IF NOT EXISTS idx_promoted_user_stories_promotion ON promoted_user_stories (promotion_id);
+CREATE INDEX IF NOT EXISTS idx_promoted_user_stories_story ON promoted_user_stories (user_story_id);
+"""
+
+
+def _soql_datetime(modstamp: str) -> str:
+    # SystemModstamp comes back as 2024-01-02T03:04:05.000+0000; SOQL literals want
+    # second precision, so the delta filter uses >= on the truncated value. That
+    # re-fetches the rows of the watermark's second; the upserts make this harmless.
+    parsed = datetime.strptime(modstamp, "%Y-%m-%dT%H:%M:%S.%f%z")
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CopadoMirror:
+    """Local SQLite copy of the Copado objects the list tools read.
+
+    The first sync loads every record; later syncs only fetch rows whose
+    SystemModstamp moved past the last one seen (through queryAll, so deletes
+    are picked up too). Reads trigger a sync once the data is older than
+    max_staleness seconds.
+    """
+
+    def __init__(self, path: str, query: Callable[..., Iterator[Dict[str, Any]]], max_staleness: float = 60.0):
+        self.path = path
+        self.max_staleness = max_staleness
+        self._query = query
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in ("environments", "user_stories", "promotions", "promoted_user_stories", "sync_state"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.executescript(SCHEMA)
+            row = self._conn.execute("SELECT MIN(synced_at) FROM sync_state").fetchone()
+        self._synced_at: Optional[float] = row[0] if row and row[0] is not None else None
+        # Unlike _synced_at, not cleared by mark_stale(): how old the served data really is
+        self._last_sync = self._synced_at
+
+    def mark_stale(self):
+        self._synced_at = None
+
+    def ensure_fresh(self) -> Optional[Dict[str, Any]]:
+        # Returns None when the data is fresh, or flags for a response served from an
+        # older copy because the sync failed
+        if self._synced_at is not None and time.time() - self._synced_at <= self.max_staleness:
+            return None
+        try:
+            self.sync()
+            return None
+        except Exception as e:
+            if self._last_sync is None and not self._has_data():
+                raise
+            logger.warning(f"Mirror sync failed: {e}. Serving data from {self.path}.")
+            age = None if self._last_sync is None else round(time.time() - self._last_sync, 1)
+            return {"stale": True, "age_seconds": age, "reason": str(e)}
+
+    def sync(self):
+        # One sync at a time; concurrent readers wait here and then see fresh data
+        with self._sync_lock:
+            if self._synced_at is not None and time.time() - self._synced_at <= self.max_staleness:
+                return
+            started = time.time()
+            for sobject in OBJECTS:
+                self._sync_object(sobject, started)
+            self._synced_at = self._last_sync = started
+
+    def _sync_object(self, sobject: str, started: float):
+        spec = OBJECTS[sobject]
+        with self._lock:
+            row = self._conn.execute("SELECT last_modstamp FROM sync_state WHERE object = ?", (sobject,)).fetchone()
+        last_modstamp = row["last_modstamp"] if row else None
+
+        soql = f"SELECT {spec['fields']}, SystemModstamp, IsDeleted FROM {sobject}"
+        if last_modstamp:
+            soql += f" WHERE SystemModstamp >= {_soql_datetime(last_modstamp)}"
+        soql += " ORDER BY SystemModstamp"
+
+        columns = spec["columns"]
+        upsert = f"INSERT OR REPLACE INTO {spec['table']} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        delete = f"DELETE FROM {spec['table']} WHERE id = ?"
+
+        # Full loads skip deleted rows; deltas go through queryAll so deletions arrive as IsDeleted
+        upserts, deletes = [], []
+        for record in self._query(soql, include_deleted=bool(last_modstamp)):
+            if record.get("IsDeleted"):
+                deletes.append((record["Id"],))
+            else:
+                upserts.append(spec["row"](record))
+            last_modstamp = max(last_modstamp or "", record["SystemModstamp"])
+            if len(upserts) + len(deletes) >= 2000:
+                self._write(upsert, upserts, delete, deletes)
+                upserts, deletes = [], []
+        self._write(upsert, upserts, delete, deletes)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                (sobject, last_modstamp, started)
+            )
+
+    def _write(self, upsert: str, upserts: List[tuple], delete: str, deletes: List[tuple]):
+        with self._lock, self._conn:
+            self._conn.executemany(upsert, upserts)
+            self._conn.executemany(delete, deletes)
+
+    def _has_data(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sync_state LIMIT 1").fetchone() is not None
+
+    def _select(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, params)]
+
+    def environments(self) -> Dict[str, str]:
+        return {r["name"]: r["id"] for r in self._select("SELECT id, name FROM environments", ())}
+
+    def _select_spec(self, table: str, spec: Dict[str, Any], offset: int, limit: int) -> List[Dict[str, Any]]:
+        # Compiles a soql.compile_spec() spec to SQL; spec field names are the column
+        # names and were validated against the catalog, so only values are bound.
+        # The caller applies spec["limit"] through offset/limit.
+        where, params = self._where(spec)
+        sql = f"SELECT {', '.join(spec['fields'])} FROM {table}{where}"
+        sql += " ORDER BY " + ", ".join([f"{field} {direction}" for field, direction in spec["order_by"]] + ["id"])
+        return self._select(sql + " LIMIT ? OFFSET ?", params + (limit, offset))
+
+    @staticmethod
+    def _where(spec: Dict[str, Any]) -> Tuple[str, tuple]:
+        conditions, params = [], []
+        for field, values in spec["equals"].items():
+            conditions.append(f"{field} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if spec["created_after"]:
+            conditions.append("created_at > ?")
+            params.append(spec["created_after"])
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), tuple(params)
+
+    def group_count(self, table: str, spec: Dict[str, Any], group_by: List[str]) -> Dict[Tuple[Any, ...], int]:
+        # group_by names are catalog fields, which are also the column names
+        where, params = self._where(spec)
+        columns = ", ".join(group_by)
+        rows = self._select(f"SELECT {columns}, COUNT(*) AS total FROM {table}{where} GROUP BY {columns}", params)
+        return {tuple(row[field] for field in group_by): row["total"] for row in rows}
+
+    def user_stories(self, spec: Dict[str, Any], offset: int = 0, limit: int = -1) -> List[Dict[str, Any]]:
+        return self._select_spec("user_stories", spec, offset, limit)
+
+    def promotions(self, spec: Dict[str, Any], offset: int = 0, limit: int = -1) -> List[Dict[str, Any]]:
+        return self._select_spec("promotions", spec, offset, limit)
+
+    def promotion_details(self, ids: List[str]) -> List[Dict[str, Any]]:
+        # Promotions with their user stories, in chunks below SQLite's bound-parameter limit
+        details: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = tuple(ids[start:start + 500])
+            marks = ", ".join("?" * len(chunk))
+            for row in self._select(f"SELECT id, name, status, source_env, target_env, created_at FROM promotions WHERE id IN ({marks})", chunk):
+                details[row["id"]] = dict(row, user_stories=[])
+            stories = self._select(
+                "SELECT pus.promotion_id, pus.user_story_id AS id, us.name, us.title FROM promoted_user_stories pus "
+                f"LEFT JOIN user_stories us ON us.id = pus.user_story_id WHERE pus.promotion_id IN ({marks}) ORDER BY pus.id",
+                chunk
+            )
+            for story in stories:
+                promotion = details.get(story.pop("promotion_id"))
+                if promotion is not None:
+                    promotion["user_stories"].append(story)
+        return list(details.values())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
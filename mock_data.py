@@ -1,5 +1,10 @@
-from typing import Dict, List, Any
-from datetime import datetime
+import os
+import json
+import random
+import threading
+from itertools import islice
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
+from datetime import datetime, timedelta
 
 class MockData:
     USER_STORIES: List[Dict[str, Any]] = [
@@ -41,3 +46,241 @@ class MockData:
     ]
 
     ENVIRONMENTS: List[str] = ["Dev", "UAT", "Staging", "Prod"]
+
+
+class MockStore:
+    """Thread-safe in-memory Copado data used in mock mode and as the fallback.
+
+    Rows are never mutated in place: update() swaps in a changed copy, so readers can
+    keep using rows they got from select() or get() without holding the lock.
+    """
+
+    def __init__(self, user_stories: List[Dict[str, Any]], promotions: List[Dict[str, Any]], environments: List[str]):
+        self._lock = threading.RLock()
+        self._rows: Dict[str, List[Dict[str, Any]]] = {"USER_STORIES": list(user_stories), "PROMOTIONS": list(promotions)}
+        self._environments = list(environments)
+        # id -> row position, kept for every collection
+        self._positions = {
+            collection: {row["id"]: pos for pos, row in enumerate(rows)}
+            for collection, rows in self._rows.items()
+        }
+        # Lazily built hash indexes: (collection, field) -> lowercased value -> row positions
+        self._indexes: Dict[Tuple[str, str], Dict[Optional[str], Set[int]]] = {}
+
+    @classmethod
+    def seeded(cls) -> "MockStore":
+        return cls(
+            [dict(r) for r in MockData.USER_STORIES],
+            [dict(r) for r in MockData.PROMOTIONS],
+            MockData.ENVIRONMENTS
+        )
+
+    @classmethod
+    def generated(cls, stories: int, promotions: int, environments: int = 4, projects: int = 10, seed: int = 42) -> "MockStore":
+        data = generate_dataset(stories, promotions, environments=environments, projects=projects, seed=seed)
+        return cls(data["USER_STORIES"], data["PROMOTIONS"], data["ENVIRONMENTS"])
+
+    @classmethod
+    def load(cls, path: str) -> "MockStore":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["USER_STORIES"], data["PROMOTIONS"], data["ENVIRONMENTS"])
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> "MockStore":
+        # A saved snapshot wins over the generator, which wins over the built-in sample
+        snapshot = settings.get("snapshot")
+        if snapshot and os.path.exists(snapshot):
+            return cls.load(snapshot)
+        if settings["stories"] or settings["promotions"]:
+            return cls.generated(
+                settings["stories"], settings["promotions"], environments=settings["environments"],
+                projects=settings["projects"], seed=settings["seed"]
+            )
+        return cls.seeded()
+
+    def save(self, path: str):
+        with self._lock:
+            data = {
+                "USER_STORIES": list(self._rows["USER_STORIES"]),
+                "PROMOTIONS": list(self._rows["PROMOTIONS"]),
+                "ENVIRONMENTS": list(self._environments)
+            }
+        # Write aside and rename so a crash never leaves a truncated snapshot. The temp
+        # name is per process: HTTP workers each save their own store on exit.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def environments(self) -> List[str]:
+        with self._lock:
+            return list(self._environments)
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return len(self._rows[collection])
+
+    def get(self, collection: str, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            pos = self._positions[collection].get(record_id)
+            return None if pos is None else self._rows[collection][pos]
+
+    def _index(self, collection: str, field: str) -> Dict[Optional[str], Set[int]]:
+        idx = self._indexes.get((collection, field))
+        if idx is None:
+            idx = {}
+            for pos, row in enumerate(self._rows[collection]):
+                idx.setdefault(_index_key(row.get(field)), set()).add(pos)
+            self._indexes[(collection, field)] = idx
+        return idx
+
+    def insert(self, collection: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            if row["id"] in self._positions[collection]:
+                raise ValueError(f"Duplicate id {row['id']}")
+            rows = self._rows[collection]
+            pos = len(rows)
+            rows.append(row)
+            self._positions[collection][row["id"]] = pos
+            for (indexed, field), idx in self._indexes.items():
+                if indexed == collection:
+                    idx.setdefault(_index_key(row.get(field)), set()).add(pos)
+        return row
+
+    def update(self, collection: str, record_id: str, **changes) -> Dict[str, Any]:
+        with self._lock:
+            pos = self._positions[collection].get(record_id)
+            if pos is None:
+                raise ValueError(f"{record_id} not found")
+            old = self._rows[collection][pos]
+            new = dict(old, **changes)
+            self._rows[collection][pos] = new
+            for (indexed, field), idx in self._indexes.items():
+                if indexed == collection and field in changes:
+                    before, after = _index_key(old.get(field)), _index_key(new.get(field))
+                    if before != after:
+                        idx[before].discard(pos)
+                        idx.setdefault(after, set()).add(pos)
+        return new
+
+    def _matches(self, collection: str, spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Rows passing a soql.compile_spec() spec's filters: the most selective equality
+        # filter is answered from its index, the rest are checked on the candidates only
+        remaining = dict(spec["equals"])
+        with self._lock:
+            rows = self._rows[collection]
+            if remaining:
+                best = None
+                for field, values in remaining.items():
+                    idx = self._index(collection, field)
+                    positions = set().union(*(idx.get(v.lower(), ()) for v in values))
+                    if best is None or len(positions) < len(best[1]):
+                        best = (field, positions)
+                del remaining[best[0]]
+                candidates = [rows[pos] for pos in sorted(best[1])]
+            else:
+                candidates = list(rows)
+
+        wanted = {field: {v.lower() for v in values} for field, values in remaining.items()}
+        return (
+            row for row in candidates
+            if all(str(row.get(field)).lower() in values for field, values in wanted.items())
+            and (not spec["created_after"] or (row.get("created_at") or "") > spec["created_after"])
+        )
+
+    def select(self, collection: str, spec: Dict[str, Any], offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        # offset/limit window the result, so unordered pages stop scanning early
+        matches = self._matches(collection, spec)
+        if spec["order_by"]:
+            matches = list(matches)
+            for field, direction in reversed(spec["order_by"]):
+                matches.sort(key=lambda row: (row.get(field) is not None, row.get(field) or ""), reverse=direction == "DESC")
+        stop = spec["limit"] or None
+        if limit is not None:
+            stop = offset + limit if stop is None else min(stop, offset + limit)
+        result = list(islice(matches, offset, stop))
+        if spec["fields_requested"]:
+            result = [{field: row.get(field) for field in spec["fields"]} for row in result]
+        return result
+
+
+    def _filtered_positions(self, collection: str, spec: Dict[str, Any]) -> Optional[Set[int]]:
+        # Positions of the rows passing the spec's filters, or None when it has none
+        positions: Optional[Set[int]] = None
+        for field, values in spec["equals"].items():
+            idx = self._index(collection, field)
+            matched = set().union(*(idx.get(v.lower(), ()) for v in values))
+            positions = matched if positions is None else positions & matched
+        if spec["created_after"]:
+            rows = self._rows[collection]
+            candidates = range(len(rows)) if positions is None else positions
+            positions = {pos for pos in candidates if (rows[pos].get("created_at") or "") > spec["created_after"]}
+        return positions
+
+    def group_count(self, collection: str, spec: Dict[str, Any], group_by: List[str]) -> Dict[Tuple[Any, ...], int]:
+        # The mock counterpart of a COUNT(Id) ... GROUP BY query, computed by intersecting
+        # the group_by fields' indexes, so rows are never scanned. Like SOQL, grouping
+        # ignores case; each group reports the value of one of its rows.
+        with self._lock:
+            rows = self._rows[collection]
+            groups: List[Tuple[Tuple[Any, ...], Optional[Set[int]]]] = [((), self._filtered_positions(collection, spec))]
+            for field in group_by:
+                idx = self._index(collection, field)
+                refined = []
+                for key, positions in groups:
+                    for value_positions in idx.values():
+                        matched = value_positions if positions is None else positions & value_positions
+                        if matched:
+                            refined.append((key + (rows[next(iter(matched))].get(field),), matched))
+                groups = refined
+            return {key: len(positions) for key, positions in groups}
+
+
+def _index_key(value: Any) -> Optional[str]:
+    return None if value is None else str(value).lower()
+
+
+STATUSES = ["Open", "In Progress", "Ready for Testing", "Completed", "Cancelled"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+PROMOTION_STATUSES = ["Draft", "Scheduled", "Completed", "Completed with errors"]
+
+
+def generate_dataset(stories: int, promotions: int, environments: int = 4, projects: int = 10, seed: int = 42) -> Dict[str, List[Any]]:
+    """Deterministic synthetic data in the MockData record shapes.
+
+    The same arguments always produce the same records, so load tests and
+    benchmarks are comparable across runs.
+    """
+    rng = random.Random(seed)
+    env_names = (["Dev", "UAT", "Staging", "Prod"] + [f"Env-{i}" for i in range(5, environments + 1)])[:environments]
+    base = datetime(2023, 1, 1)
+
+    user_stories = []
+    for i in range(1, stories + 1):
+        user_stories.append({
+            "id": f"US-{i:07d}",
+            "name": f"US-{i:07d}",
+            "title": f"User story {i}",
+            "status": rng.choice(STATUSES),
+            "priority": rng.choice(PRIORITIES),
+            "description": f"Synthetic user story {i}.",
+            "project": f"Project-{rng.randrange(projects) + 1}",
+            "created_at": (base + timedelta(minutes=i)).isoformat() + "Z"
+        })
+
+    promotion_rows = []
+    for i in range(1, promotions + 1):
+        source = rng.randrange(max(1, len(env_names) - 1))
+        picked = rng.sample(range(stories), min(stories, rng.randint(1, 10))) if stories else []
+        promotion_rows.append({
+            "id": f"P-{i:07d}",
+            "name": f"P-{i:07d}",
+            "source_env": env_names[source],
+            "target_env": env_names[min(source + 1, len(env_names) - 1)],
+            "status": rng.choice(PROMOTION_STATUSES),
+            "user_stories": [user_stories[j]["id"] for j in sorted(picked)],
+            "created_at": (base + timedelta(minutes=i * 7)).isoformat() + "Z"
+        })
+
+    return {"USER_STORIES": user_stories, "PROMOTIONS": promotion_rows, "ENVIRONMENTS": env_names}
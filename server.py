@@ -1,17 +1,284 @@
+import os
+import csv
 import sys
 import json
+import time
 import logging
-from typing import Any, Dict, List, Optional
-from .client import CopadoClient
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from .client import CopadoClient, ExportError, DEFAULT_PAGE_SIZE
+from .config import load_config
+from .jobs import JobManager, Progress
+from .metrics import Metrics
+from .mock_data import MockStore
+from .soql import USER_STORY_FIELDS, PROMOTION_FIELDS
+
+try:
+    # Optional: several times faster than json for large listings
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging to stderr so it doesn't interfere with stdout JSON-RPC
 logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-import os
+OUTPUT_FORMATS = ("pretty", "compact", "columnar")
+EXPORT_FORMATS = ("jsonl", "csv")
+
+
+def _dumps(obj: Any, pretty: bool = False) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+    if pretty:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _encode(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _render(page: Dict[str, Any], fmt: str) -> str:
+    # The tool text is JSON-encoded again inside the JSON-RPC envelope, so every byte of
+    # whitespace and every repeated key is paid for twice
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid format '{fmt}'. Use one of {list(OUTPUT_FORMATS)}")
+    if fmt == "columnar":
+        records = page["records"]
+        fields = list(dict.fromkeys(key for record in records for key in record))
+        columnar = {"fields": fields, "rows": [[record.get(f) for f in fields] for record in records]}
+        columnar.update((k, v) for k, v in page.items() if k != "records")
+        return _dumps(columnar)
+    return _dumps(page, pretty=fmt == "pretty")
+
+
+def _filter_properties(catalog: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "statuses": {"type": "array", "items": {"type": "string"}, "description": "Match any of these statuses"},
+        "created_after": {"type": "string", "description": "ISO-8601 date or datetime; only records created after it"},
+        "fields": {"type": "array", "items": {"type": "string", "enum": sorted(catalog)}, "description": "Fields to return (default: all standard fields)"},
+        "order_by": {"type": "string", "description": "Comma-separated '<field> [asc|desc]' terms"},
+        "limit": {"type": "integer", "description": "Maximum records across all pages"},
+        "format": {
+            "type": "string",
+            "enum": list(OUTPUT_FORMATS),
+            "description": "pretty (indented), compact (minified) or columnar (one fields header plus rows arrays)"
+        }
+    }
+
+
+def _query_properties(catalog: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        **_filter_properties(catalog),
+        "cursor": {"type": "string", "description": "Opaque next_cursor from a previous page"},
+        "page_size": {"type": "integer", "description": f"Records per page (default {DEFAULT_PAGE_SIZE})"}
+    }
+
+
+def _export_properties(catalog: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        **_filter_properties(catalog),
+        "path": {"type": "string", "description": "Write the records to this file under the server's export directory instead of returning them"},
+        "file_format": {"type": "string", "enum": list(EXPORT_FORMATS), "description": "File format when path is given (default jsonl)"}
+    }
+
+
+def _write_export(records: Iterator[Dict[str, Any]], path: str, file_format: str) -> int:
+    # Streams records to a temporary file and renames it into place when complete
+    tmp = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp, "w", newline="") as f:
+            writer = None
+            for record in records:
+                if file_format == "csv":
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(record))
+                        writer.writeheader()
+                    writer.writerow(record)
+                else:
+                    f.write(_dumps(record))
+                    f.write("\n")
+                count += 1
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return count
+
+
+# Single declaration of every tool: tools/list is generated from it and tools/call
+# dispatches on it. "name" is also the MCPServer method that implements the tool;
+# "progress" tools receive a progress reporter and a wait default.
+TOOLS: List[Dict[str, Any]] = [
+    {
+        "name": "list_user_stories",
+        "description": "List user stories from Copado",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "description": "Optional status filter"},
+                "project": {"type": "string", "description": "Project name"},
+                "priority": {"type": "string"},
+                **_query_properties(USER_STORY_FIELDS)
+            }
+        }
+    },
+    {
+        "name": "list_promotions",
+        "description": "List all promotions",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "description": "Optional status filter"},
+                "source_env": {"type": "string", "description": "Source environment name"},
+                "target_env": {"type": "string", "description": "Destination environment name"},
+                **_query_properties(PROMOTION_FIELDS)
+            }
+        }
+    },
+    {
+        "name": "get_promotion_details",
+        "description": "Get many promotions at once, each with its promoted user stories (id, name, title)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "promotion_ids": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["promotion_ids"]
+        }
+    },
+    {
+        "name": "summarize_pipeline",
+        "description": "Count user stories per project and status, and promotions per source/target environment and status, without listing the records",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "project": {"type": "string", "description": "Only count user stories of this project"},
+                "created_after": {"type": "string", "description": "ISO-8601 date or datetime; only count records created after it"}
+            }
+        }
+    },
+    {
+        "name": "export_user_stories",
+        "description": "Export every matching user story in one go (a Bulk API 2.0 job against Salesforce), inline or to a file",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "description": "Optional status filter"},
+                "project": {"type": "string", "description": "Project name"},
+                "priority": {"type": "string"},
+                **_export_properties(USER_STORY_FIELDS)
+            }
+        }
+    },
+    {
+        "name": "export_promotions",
+        "description": "Export every matching promotion in one go (a Bulk API 2.0 job against Salesforce), inline or to a file",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "description": "Optional status filter"},
+                "source_env": {"type": "string", "description": "Source environment name"},
+                "target_env": {"type": "string", "description": "Destination environment name"},
+                **_export_properties(PROMOTION_FIELDS)
+            }
+        }
+    },
+    {
+        "name": "create_promotion",
+        "description": "Create a new promotion",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "source_env": {"type": "string"},
+                "target_env": {"type": "string"},
+                "user_story_ids": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["source_env", "target_env", "user_story_ids"]
+        }
+    },
+    {
+        "name": "deploy_promotion",
+        "description": "Start deploying an existing promotion; returns a job handle to poll with get_deploy_status",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "promotion_id": {"type": "string"},
+                "wait": {"type": "boolean", "description": "Hold the response until the deployment finishes (default: true only when a progressToken is supplied)"}
+            },
+            "required": ["promotion_id"]
+        },
+        "progress": True
+    },
+    {
+        "name": "deploy_promotions",
+        "description": "Deploy several independent promotions concurrently as one batch job",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "promotion_ids": {"type": "array", "items": {"type": "string"}},
+                "max_parallel": {"type": "integer", "description": "Deployments run at once (capped by the server's deploy.max_parallel)"},
+                "wait": {"type": "boolean", "description": "Hold the response until every deployment finishes"}
+            },
+            "required": ["promotion_ids"]
+        },
+        "progress": True
+    },
+    {
+        "name": "get_deploy_status",
+        "description": "Get the status and progress of a deploy job",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "job_id": {"type": "string"}
+            },
+            "required": ["job_id"]
+        }
+    },
+    {
+        "name": "server_stats",
+        "description": "Per-tool latency, Salesforce call counts, cache hits, mock fallbacks, circuit breaker states and remaining daily API allotment",
+        "inputSchema": {"type": "object", "properties": {}}
+    }
+]
+TOOL_INDEX = {tool["name"]: tool for tool in TOOLS}
+
+# Results of the requests whose answer never changes, built once. The stdio loop splices
+# the pre-encoded bytes into the response instead of serializing them per request.
+STATIC_RESULTS: Dict[str, Dict[str, Any]] = {
+    "initialize": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {
+            "tools": {}
+        },
+        "serverInfo": {
+            "name": "copado-mcp-server",
+            "version": "0.1.0"
+        }
+    },
+    "tools/list": {
+        "tools": [{key: tool[key] for key in ("name", "description", "inputSchema")} for tool in TOOLS]
+    }
+}
+STATIC_ENCODED = {method: _encode(result) for method, result in STATIC_RESULTS.items()}
+
+
+def static_response(req_id: Any, method: str) -> bytes:
+    return b'{"jsonrpc":"2.0","id":' + _encode(req_id) + b',"result":' + STATIC_ENCODED[method] + b'}'
+
 
 class MCPServer:
-    def __init__(self):
+    def __init__(self, wait_for_jobs: bool = False):
+        self.config = load_config()
+        # Deploy jobs live in this process. When it is one of several HTTP workers a later
+        # get_deploy_status may reach another one, so deploy tools always wait instead.
+        self.wait_for_jobs = wait_for_jobs
+
         # Check for Salesforce credentials in environment variables
         instance_url = os.environ.get("SALESFORCE_INSTANCE_URL")
         access_token = os.environ.get("SALESFORCE_ACCESS_TOKEN")
@@ -23,32 +290,240 @@ class MCPServer:
         else:
             logger.info("No Salesforce credentials found. Running in MOCK mode.")
 
-        self.client = CopadoClient(instance_url=instance_url, access_token=access_token, mock=mock_mode)
-        self.tools = {
-            "list_user_stories": self.list_user_stories,
-            "list_promotions": self.list_promotions,
-            "create_promotion": self.create_promotion,
-            "deploy_promotion": self.deploy_promotion
-        }
+        self.metrics = Metrics()
+        # The client (and with it the HTTP stack and mock data) is built on the first
+        # tools/call, so initialize and tools/list are answered without waiting for it
+        self._credentials = (instance_url, access_token, mock_mode)
+        self._client: Optional[CopadoClient] = None
+        self._client_lock = threading.Lock()
+        self.tools = {tool["name"]: getattr(self, tool["name"]) for tool in TOOLS}
+        self.jobs = JobManager(max_workers=self.config["deploy"]["max_workers"], retention=self.config["deploy"]["retention"])
 
-    def list_user_stories(self, status: Optional[str] = None) -> str:
-        return json.dumps(self.client.get_user_stories(status), indent=2)
+        # Concurrent dispatch state: one writer lock for stdout, in-flight tools/call
+        # futures by request id, and ids cancelled while already running.
+        self._write_lock = threading.Lock()
+        self._inflight_lock = threading.RLock()
+        self._inflight: Dict[Any, Future] = {}
+        self._cancelled: set = set()
+        self._slots = threading.BoundedSemaphore(self.config["server"]["max_pending"])
+        # Tool calls and batch elements share one pool, whichever transport delivers them
+        self._executor = ThreadPoolExecutor(max_workers=self.config["server"]["max_workers"], thread_name_prefix="mcp-tool")
 
-    def list_promotions(self) -> str:
-        return json.dumps(self.client.get_promotions(), indent=2)
+        if self.config["metrics"]["dump_interval"] > 0:
+            threading.Thread(target=self._dump_stats, name="stats-dump", daemon=True).start()
 
-    def create_promotion(self, source_env: str, target_env: str, user_story_ids: List[str]) -> str:
+    @property
+    def client(self) -> CopadoClient:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> CopadoClient:
+        instance_url, access_token, mock_mode = self._credentials
+        self.store = MockStore.from_config(self.config["mock_data"])
+        client = CopadoClient(instance_url=instance_url, access_token=access_token, mock=mock_mode, config=self.config, metrics=self.metrics, store=self.store)
+        if self.config["environments"]["preload"]:
+            # Warm the environment index off the calling path
+            threading.Thread(target=client.preload_environments, daemon=True).start()
+        return client
+
+    def list_user_stories(self, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE, format: Optional[str] = None, **query) -> str:
         try:
-            return json.dumps(self.client.create_promotion(source_env, target_env, user_story_ids), indent=2)
+            page = self.client.get_user_stories_page(cursor=cursor, page_size=page_size, **query)
+            return _render(page, format or self.config["server"]["default_format"])
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+    def list_promotions(self, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE, format: Optional[str] = None, **query) -> str:
+        try:
+            page = self.client.get_promotions_page(cursor=cursor, page_size=page_size, **query)
+            return _render(page, format or self.config["server"]["default_format"])
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+    def get_promotion_details(self, promotion_ids: List[str]) -> str:
+        try:
+            return json.dumps(self.client.get_promotion_details(promotion_ids), indent=2)
         except ValueError as e:
             return f"Error: {str(e)}"
 
-    def deploy_promotion(self, promotion_id: str) -> str:
+    def summarize_pipeline(self, project: Optional[str] = None, created_after: Optional[str] = None) -> str:
         try:
-            return json.dumps(self.client.deploy_promotion(promotion_id), indent=2)
+            return json.dumps(self.client.summarize_pipeline(project=project, created_after=created_after), indent=2)
         except ValueError as e:
             return f"Error: {str(e)}"
 
+    def export_user_stories(self, path: Optional[str] = None, file_format: str = "jsonl", format: Optional[str] = None, **query) -> str:
+        try:
+            return self._export(lambda: self.client.export_user_stories(**query), path, file_format, format)
+        except (ValueError, ExportError) as e:
+            return f"Error: {str(e)}"
+
+    def export_promotions(self, path: Optional[str] = None, file_format: str = "jsonl", format: Optional[str] = None, **query) -> str:
+        try:
+            return self._export(lambda: self.client.export_promotions(**query), path, file_format, format)
+        except (ValueError, ExportError) as e:
+            return f"Error: {str(e)}"
+
+    def _export(self, records: Callable[[], Iterator[Dict[str, Any]]], path: Optional[str], file_format: str, fmt: Optional[str]) -> str:
+        # Arguments are checked before the export starts; it may run for minutes
+        fmt = fmt or self.config["server"]["default_format"]
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Invalid format '{fmt}'. Use one of {list(OUTPUT_FORMATS)}")
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid file_format '{file_format}'. Use one of {list(EXPORT_FORMATS)}")
+        if not path:
+            rows = list(records())
+            return _render({"records": rows, "count": len(rows)}, fmt)
+
+        # realpath resolves symlinks, so a link inside export_dir cannot point the file elsewhere
+        root = os.path.realpath(self.config["bulk"]["export_dir"])
+        target = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, target]) != root or target == root:
+            raise ValueError(f"Export path must be a file inside {root}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        count = _write_export(records(), target, file_format)
+        return json.dumps({"path": target, "file_format": file_format, "count": count}, indent=2)
+
+    def create_promotion(self, source_env: str, target_env: str, user_story_ids: List[str]) -> str:
+        try:
+            return json.dumps(self.client.create_promotion(source_env, target_env, user_story_ids), indent=2)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+    def deploy_promotion(self, promotion_id: str, wait: bool = False, progress: Optional[Progress] = None) -> str:
+        # Returns a job handle at once; the deployment is tracked in the background
+        job = self.jobs.submit(promotion_id, lambda report: self.client.deploy_promotion(promotion_id, progress=report, stop=self.jobs.stopping), progress)
+        if wait:
+            job.done.wait()
+        return json.dumps(job.to_dict(), indent=2)
+
+    def deploy_promotions(self, promotion_ids: List[str], max_parallel: Optional[int] = None, wait: bool = False, progress: Optional[Progress] = None) -> str:
+        if not promotion_ids:
+            return "Error: promotion_ids must not be empty"
+        limit = self.config["deploy"]["max_parallel"]
+        deploys = {
+            promotion_id: (lambda report, promotion_id=promotion_id: self.client.deploy_promotion(promotion_id, progress=report, stop=self.jobs.stopping))
+            for promotion_id in promotion_ids
+        }
+        job = self.jobs.submit_batch(deploys, min(max_parallel or limit, limit), progress)
+        if wait:
+            job.done.wait()
+        return json.dumps(job.to_dict(), indent=2)
+
+    def get_deploy_status(self, job_id: str) -> str:
+        job = self.jobs.get(job_id)
+        if job is None and self.wait_for_jobs:
+            return f"Error: Deploy job {job_id} not found. This server runs several worker processes, so deploy tools return the final status themselves instead of a job to poll"
+        if job is None:
+            return f"Error: Deploy job {job_id} not found"
+        return json.dumps(job.to_dict(), indent=2)
+
+    def server_stats(self) -> str:
+        stats = self.metrics.snapshot()
+        if self._client is not None:
+            stats["circuits"] = self._client.circuits()
+        return json.dumps(stats, indent=2)
+
+    def _dump_stats(self):
+        # One JSON line per interval on stderr, next to the logs
+        interval = self.config["metrics"]["dump_interval"]
+        while True:
+            time.sleep(interval)
+            sys.stderr.write(_dumps({"copado_mcp_stats": self.metrics.snapshot()}) + "\n")
+            sys.stderr.flush()
+
+    @staticmethod
+    def _progress_reporter(token: Any, notify: Callable[[Dict[str, Any]], None]) -> Optional[Progress]:
+        if token is None:
+            return None
+
+        def report(percent: int, message: str):
+            notify({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"progressToken": token, "progress": percent, "total": 100, "message": message}
+            })
+        return report
+
+    def _send(self, message: Dict[str, Any]):
+        self._write(_encode(message) + b"\n")
+
+    def _write(self, line: bytes):
+        # Responses complete out of order on worker threads; write whole lines
+        with self._write_lock:
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+
+    def _dispatch(self, request: Union[Dict[str, Any], List[Any]]):
+        if isinstance(request, list):
+            # A batch is answered with one line once all of its calls are done; its
+            # elements cannot be cancelled
+            self._run_batch(request, self._send, self._write_batch)
+            return
+
+        method = request.get("method")
+        if method == "notifications/cancelled":
+            self._cancel(request.get("params", {}).get("requestId"))
+            return
+
+        if method in STATIC_ENCODED and "id" in request:
+            self._write(static_response(request["id"], method) + b"\n")
+            return
+
+        if method == "tools/call" and "id" in request:
+            # Tool calls may block on Salesforce; run them on the pool so fast
+            # requests queued behind them are answered immediately.
+            req_id = request["id"]
+            self._slots.acquire()
+            future = self._executor.submit(self.handle_request, request)
+            with self._inflight_lock:
+                self._inflight[req_id] = future
+            future.add_done_callback(lambda f: self._finish(req_id, f))
+            return
+
+        response = self.handle_request(request)
+        if response:
+            self._send(response)
+
+    def _cancel(self, req_id: Any):
+        with self._inflight_lock:
+            future = self._inflight.get(req_id)
+            if future is None:
+                return
+            # A queued call is dropped outright; a running one cannot be interrupted,
+            # so its response is suppressed when it finishes.
+            if not future.cancel():
+                self._cancelled.add(req_id)
+        logger.info(f"Cancelled request {req_id}")
+
+    def _finish(self, req_id: Any, future: Future):
+        with self._inflight_lock:
+            self._inflight.pop(req_id, None)
+            cancelled = req_id in self._cancelled
+            self._cancelled.discard(req_id)
+        self._slots.release()
+
+        if cancelled or future.cancelled():
+            return
+        response = self._result(req_id, future)
+        if response:
+            self._send(response)
+
+    @staticmethod
+    def _result(req_id: Any, future: Future) -> Optional[Dict[str, Any]]:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Error processing request {req_id}: {e}")
+            return {"jsonrpc": "2.0", "id": req_id, "error": {"code": -32603, "message": str(e)}}
+
+    def _write_batch(self, responses: Union[None, Dict[str, Any], List[Dict[str, Any]]]):
+        if responses:
+            self._write(_encode(responses) + b"\n")
+
     def run(self):
         logger.info("Starting Copado MCP Server (Stdio)...")
         while True:
@@ -56,107 +531,70 @@ class MCPServer:
                 line = sys.stdin.readline()
                 if not line:
                     break
-                
+
                 request = json.loads(line)
-                self.handle_request(request)
+                self._dispatch(request)
             except json.JSONDecodeError:
                 logger.error("Invalid JSON received")
             except Exception as e:
                 logger.error(f"Error processing request: {e}")
+        # The host is gone: release calls waiting on deployments, then wait for in-flight
+        # calls so their responses are written
+        self.jobs.shutdown()
+        self._executor.shutdown(wait=True)
+        self.close()
+
+    def close(self):
+        self.jobs.shutdown()
+        self._executor.shutdown(wait=False)
+        snapshot = self.config["mock_data"]["snapshot"]
+        if snapshot and self._client is not None:
+            self.store.save(snapshot)
 
-    def handle_request(self, request: Dict[str, Any]):
+    def _call_tool(self, tool: Dict[str, Any], params: Dict[str, Any], notify: Optional[Callable[[Dict[str, Any]], None]]) -> str:
+        args = params.get("arguments") or {}
+        schema = tool["inputSchema"]
+        missing = [key for key in schema.get("required", []) if args.get(key) is None]
+        if missing:
+            return f"Error: Missing required argument(s): {', '.join(missing)}"
+        # Arguments outside the declared schema are ignored
+        kwargs = {key: value for key, value in args.items() if key in schema["properties"]}
+        if tool.get("progress"):
+            # Progress is streamed only for calls that carry a progressToken, and such
+            # calls wait for their job by default so notifications precede the response
+            progress_token = params.get("_meta", {}).get("progressToken")
+            kwargs.setdefault("wait", progress_token is not None)
+            if self.wait_for_jobs:
+                kwargs["wait"] = True
+            kwargs["progress"] = self._progress_reporter(progress_token, notify or self._send)
+        return self.tools[tool["name"]](**kwargs)
+
+    def handle_request(self, request: Union[Dict[str, Any], List[Any]], notify: Optional[Callable[[Dict[str, Any]], None]] = None) -> Union[None, Dict[str, Any], List[Dict[str, Any]]]:
+        # notify delivers server-initiated messages (progress) for this request's transport
+        if isinstance(request, list):
+            return self._handle_batch(request, notify)
+        if "id" not in request:
+            # Notifications are never answered (notifications/cancelled is handled by the
+            # stdio dispatcher)
+            return None
         req_id = request.get("id")
         method = request.get("method")
         params = request.get("params", {})
 
         response = None
 
-        if method == "initialize":
-            response = {
-                "jsonrpc": "2.0",
-                "id": req_id,
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {}
-                    },
-                    "serverInfo": {
-                        "name": "copado-mcp-server",
-                        "version": "0.1.0"
-                    }
-                }
-            }
-        elif method == "notifications/initialized":
-            # No response needed for notifications
-            return
-        elif method == "tools/list":
-            response = {
-                "jsonrpc": "2.0",
-                "id": req_id,
-                "result": {
-                    "tools": [
-                        {
-                            "name": "list_user_stories",
-                            "description": "List user stories from Copado",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "status": {"type": "string", "description": "Optional status filter"}
-                                }
-                            }
-                        },
-                        {
-                            "name": "list_promotions",
-                            "description": "List all promotions",
-                            "inputSchema": {"type": "object", "properties": {}}
-                        },
-                        {
-                            "name": "create_promotion",
-                            "description": "Create a new promotion",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "source_env": {"type": "string"},
-                                    "target_env": {"type": "string"},
-                                    "user_story_ids": {"type": "array", "items": {"type": "string"}}
-                                },
-                                "required": ["source_env", "target_env", "user_story_ids"]
-                            }
-                        },
-                        {
-                            "name": "deploy_promotion",
-                            "description": "Deploy an existing promotion",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "promotion_id": {"type": "string"}
-                                },
-                                "required": ["promotion_id"]
-                            }
-                        }
-                    ]
-                }
-            }
+        if method in STATIC_RESULTS:
+            response = {"jsonrpc": "2.0", "id": req_id, "result": STATIC_RESULTS[method]}
         elif method == "tools/call":
             name = params.get("name")
-            args = params.get("arguments", {})
-            
-            if name in self.tools:
+            tool = TOOL_INDEX.get(name)
+            if tool is not None:
                 try:
-                    result_text = ""
-                    if name == "list_user_stories":
-                        result_text = self.list_user_stories(status=args.get("status"))
-                    elif name == "list_promotions":
-                        result_text = self.list_promotions()
-                    elif name == "create_promotion":
-                        result_text = self.create_promotion(
-                            source_env=args.get("source_env"),
-                            target_env=args.get("target_env"),
-                            user_story_ids=args.get("user_story_ids")
-                        )
-                    elif name == "deploy_promotion":
-                        result_text = self.deploy_promotion(promotion_id=args.get("promotion_id"))
-                    
+                    with self.metrics.tool_call(name) as outcome:
+                        result_text = self._call_tool(tool, params, notify)
+                        # Tools report bad input as text rather than raising
+                        outcome["error"] = result_text.startswith("Error")
+
                     response = {
                         "jsonrpc": "2.0",
                         "id": req_id,
@@ -176,10 +614,50 @@ class MCPServer:
                     "id": req_id,
                     "error": {"code": -32601, "message": "Method not found"}
                 }
-        
-        if response:
-            sys.stdout.write(json.dumps(response) + "\n")
-            sys.stdout.flush()
+        else:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": -32601, "message": "Method not found"}}
+
+        return response
+
+    def _handle_batch(self, batch: List[Any], notify: Optional[Callable[[Dict[str, Any]], None]]) -> Union[None, Dict[str, Any], List[Dict[str, Any]]]:
+        # Blocks the calling (transport) thread until the whole batch is answered
+        answered: Future = Future()
+        self._run_batch(batch, notify, answered.set_result)
+        return answered.result()
+
+    def _run_batch(self, batch: List[Any], notify: Optional[Callable[[Dict[str, Any]], None]], done: Callable[[Union[None, Dict[str, Any], List[Dict[str, Any]]]], None]):
+        # JSON-RPC batch: its tools/call requests run concurrently on the tool pool, each
+        # holding a max_pending slot like a single call, and done() receives the responses
+        # in request order once the last one finishes. Notifications get no entry, so an
+        # all-notification batch is answered with None.
+        if not batch:
+            done({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            return
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        remaining = [len(batch)]
+        lock = threading.Lock()
+
+        def answer(index: int, response: Optional[Dict[str, Any]]):
+            responses[index] = response
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                done([r for r in responses if r is not None] or None)
+
+        def finished(index: int, req_id: Any, future: Future):
+            self._slots.release()
+            answer(index, self._result(req_id, future))
+
+        for index, message in enumerate(batch):
+            if not isinstance(message, dict):
+                answer(index, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            elif message.get("method") == "tools/call" and "id" in message:
+                self._slots.acquire()
+                future = self._executor.submit(self.handle_request, message, notify)
+                future.add_done_callback(lambda f, index=index, req_id=message["id"]: finished(index, req_id, f))
+            else:
+                answer(index, self.handle_request(message, notify))
 
 if __name__ == "__main__":
     server = MCPServer()
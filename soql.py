@@ -0,0 +1,203 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# Simplified field name (what the tools expose) -> SOQL field path, per object.
+# The first entries of each catalog are the default projection.
+USER_STORY_FIELDS: Dict[str, str] = {
+    "id": "Id",
+    "name": "Name",
+    "title": "copado__User_Story_Title__c",
+    "status": "copado__Status__c",
+    "priority": "copado__Priority__c",
+    "project": "copado__Project__r.Name",
+    "created_at": "CreatedDate"
+}
+USER_STORY_DEFAULT_FIELDS = ["id", "name", "title", "status", "priority", "project"]
+
+PROMOTION_FIELDS: Dict[str, str] = {
+    "id": "Id",
+    "name": "Name",
+    "status": "copado__Status__c",
+    "source_env": "copado__Source_Environment__r.Name",
+    "target_env": "copado__Destination_Environment__r.Name",
+    "created_at": "CreatedDate"
+}
+PROMOTION_DEFAULT_FIELDS = ["id", "name", "status", "source_env", "target_env"]
+
+# The user stories of a promotion, read through its copado__Promoted_User_Stories__r
+# child relationship; "id" is the user story's Id, not the junction record's
+PROMOTED_STORY_FIELDS: Dict[str, str] = {
+    "id": "copado__User_Story__c",
+    "name": "copado__User_Story__r.Name",
+    "title": "copado__User_Story__r.copado__User_Story_Title__c"
+}
+
+# Characters SOQL requires escaping inside a quoted string literal
+_ESCAPES = {
+    "\\": "\\\\",
+    "'": "\\'",
+    '"': '\\"',
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+    "\b": "\\b",
+    "\f": "\\f"
+}
+
+
+_STRING_LITERAL = re.compile(r"'(?:\\.|[^'\\])*'")
+
+
+def normalize(soql: str) -> str:
+    # Collapses whitespace outside string literals, so equivalent queries compare equal
+    parts = []
+    pos = 0
+    for match in _STRING_LITERAL.finditer(soql):
+        parts.append(re.sub(r"\s+", " ", soql[pos:match.start()]))
+        parts.append(match.group())
+        pos = match.end()
+    parts.append(re.sub(r"\s+", " ", soql[pos:]))
+    return "".join(parts).strip()
+
+
+def quote(value: Any) -> str:
+    return "'" + "".join(_ESCAPES.get(c, c) for c in str(value)) + "'"
+
+
+def datetime_literal(value: str) -> str:
+    # Accepts a date or ISO-8601 datetime; naive values are taken as UTC
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid datetime '{value}'. Use ISO-8601, e.g. 2024-01-31 or 2024-01-31T12:00:00Z")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _as_list(value: Union[None, str, Sequence[str]]) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value]
+
+
+def compile_spec(
+    catalog: Dict[str, str],
+    default_fields: List[str],
+    filters: Optional[Dict[str, Union[None, str, Sequence[str]]]] = None,
+    created_after: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    order_by: Union[None, str, Sequence[str]] = None,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """Validate tool arguments against a field catalog.
+
+    The resulting spec is backend-neutral: to_soql() compiles it for Salesforce,
+    and the mock store and SQLite mirror apply it locally.
+    """
+    projection = list(fields) if fields else list(default_fields)
+    for name in projection:
+        if name not in catalog:
+            raise ValueError(f"Unknown field '{name}'. Available: {sorted(catalog)}")
+
+    equals: Dict[str, List[str]] = {}
+    for name, value in (filters or {}).items():
+        if name not in catalog:
+            raise ValueError(f"Unknown filter field '{name}'")
+        values = _as_list(value)
+        if values:
+            equals[name] = values
+
+    ordering: List[Tuple[str, str]] = []
+    for term in _as_list(order_by.split(",") if isinstance(order_by, str) else order_by):
+        parts = term.split()
+        if not parts:
+            continue
+        direction = parts[1].upper() if len(parts) > 1 else "ASC"
+        if parts[0] not in catalog or direction not in ("ASC", "DESC") or len(parts) > 2:
+            raise ValueError(f"Invalid order_by '{term.strip()}'. Use '<field> [asc|desc]' with one of {sorted(catalog)}")
+        ordering.append((parts[0], direction))
+
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError("limit must be a positive integer")
+
+    return {
+        "fields": projection,
+        # Local backends keep their full rows unless a projection was asked for
+        "fields_requested": bool(fields),
+        "equals": equals,
+        "created_after": datetime_literal(created_after) if created_after else None,
+        "order_by": ordering,
+        "limit": limit
+    }
+
+
+def spec_key(spec: Dict[str, Any]) -> Tuple:
+    # Hashable, case-normalized form of a spec for cache keys
+    return (
+        tuple(spec["fields"]),
+        tuple(sorted((k, tuple(sorted(v.lower() for v in vs))) for k, vs in spec["equals"].items())),
+        spec["created_after"],
+        tuple(spec["order_by"]),
+        spec["limit"]
+    )
+
+
+def _where(catalog: Dict[str, str], spec: Dict[str, Any], after_id: Optional[str] = None) -> str:
+    conditions = []
+    for name, values in spec["equals"].items():
+        if len(values) == 1:
+            conditions.append(f"{catalog[name]} = {quote(values[0])}")
+        else:
+            conditions.append(f"{catalog[name]} IN ({', '.join(quote(v) for v in values)})")
+    if spec["created_after"]:
+        conditions.append(f"{catalog['created_at']} > {spec['created_after']}")
+    if after_id:
+        conditions.append(f"Id > {quote(after_id)}")
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def to_soql(sobject: str, catalog: Dict[str, str], spec: Dict[str, Any], subqueries: Sequence[str] = (), after_id: Optional[str] = None) -> str:
+    # Id is always selected so mapped records keep their key even when not projected.
+    # subqueries are parent-child relationship queries added to the SELECT list.
+    # after_id keeps only records with a greater Id (keyset paging over ORDER BY Id).
+    paths = [catalog[name] for name in spec["fields"]]
+    select = ", ".join(list(dict.fromkeys(["Id"] + paths)) + [f"({subquery})" for subquery in subqueries])
+    query = f"SELECT {select} FROM {sobject}{_where(catalog, spec, after_id)}"
+    if spec["order_by"]:
+        query += " ORDER BY " + ", ".join(f"{catalog[name]} {direction}" for name, direction in spec["order_by"])
+    if spec["limit"]:
+        query += f" LIMIT {spec['limit']}"
+    return query
+
+
+def to_group_count_soql(sobject: str, catalog: Dict[str, str], spec: Dict[str, Any], group_by: List[str]) -> str:
+    # COUNT(Id) per distinct combination of the group_by fields. Grouped fields are aliased
+    # to their tool names, so AggregateResult rows come back keyed by them plus "total".
+    # The spec's filters apply; its projection, ordering and limit do not.
+    select = ", ".join(f"{catalog[name]} {name}" for name in group_by)
+    paths = ", ".join(catalog[name] for name in group_by)
+    return f"SELECT {select}, COUNT(Id) total FROM {sobject}{_where(catalog, spec)} GROUP BY {paths}"
+
+
+def extract(record: Dict[str, Any], path: str) -> Any:
+    # Follows relationship paths such as copado__Project__r.Name; a null parent yields None
+    value: Any = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def map_record(record: Dict[str, Any], catalog: Dict[str, str], fields: List[str]) -> Dict[str, Any]:
+    return {name: extract(record, catalog[name]) for name in fields}
+
+
+def map_flat_record(row: Dict[str, str], catalog: Dict[str, str], fields: List[str]) -> Dict[str, Any]:
+    # Bulk API CSV rows are flat, keyed by field path, with "" for null
+    return {name: row.get(catalog[name]) or None for name in fields}
+